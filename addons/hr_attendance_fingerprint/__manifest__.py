@@ -7,16 +7,24 @@
         This module inherits:
         - hr.employee to add Fingerprint ID (FID)
         - hr.attendance to add external metadata
-        - Settings to configure API Endpoint
+        - Fingerprint devices to configure API Endpoints
         - Scheduled action to sync data
+
+        Optional: install the ijson Python package to decode large API pages
+        incrementally instead of loading them whole.
     """,
     'author': 'Antigravity',
     'depends': ['hr_attendance'],
     'data': [
         'security/ir.model.access.csv',
+        'views/fingerprint_log_quarantine_views.xml',
+        'views/fingerprint_sync_run_views.xml',
+        'views/fingerprint_device_views.xml',
+        'views/fingerprint_push_queue_views.xml',
         'views/res_config_settings_views.xml',
         'views/hr_employee_views.xml',
         'views/hr_attendance_views.xml',
+        'wizard/fingerprint_replay_wizard_views.xml',
         'data/ir_cron_data.xml',
     ],
     'installable': True,
@@ -7,7 +7,7 @@ _logger = logging.getLogger(__name__)
 
 class AttendancePushController(http.Controller):
 
-    @http.route('/api/hr_attendance/push', type='json', auth='none', methods=['POST'], csrf=False)
+    @http.route('/api/hr_attendance/push', type='http', auth='none', methods=['POST'], csrf=False)
     def push_attendance(self, **kwargs):
         """
         Endpoint to receive real-time attendance logs via POST JSON.
@@ -24,24 +24,28 @@ class AttendancePushController(http.Controller):
                 }
             ]
         }
+        The logs are only validated and staged here (202 Accepted), the
+        attendances are created by the push queue cron.
         """
         try:
-            config = request.env['ir.config_parameter'].sudo()
-            data = request.get_json_data()
+            data = json.loads(request.httprequest.get_data() or b'{}')
+        except ValueError:
+            return request.make_json_response({"status": "error", "message": "Invalid JSON body"}, status=400)
 
-            logs = data.get('logs', [])
-            if not logs:
-                return {"status": "error", "message": "No logs provided"}
+        # Accept JSON-RPC style bodies sent by clients of the former json route
+        if isinstance(data, dict) and isinstance(data.get('params'), dict):
+            data = data['params']
 
-            # Use the existing processing logic from the model
-            type_in = int(config.get_param('hr_attendance_fingerprint.type_check_in') or 0)
-            type_out = int(config.get_param('hr_attendance_fingerprint.type_check_out') or 1)
-            api_tz_name = config.get_param('hr_attendance_fingerprint.api_timezone') or 'Asia/Makassar'
-
-            request.env['hr.attendance'].sudo()._process_attendance_logs(logs, type_in, type_out, api_tz_name)
-            
-            return {"status": "success", "message": f"Processed {len(logs)} logs"}
+        logs = data.get('logs') if isinstance(data, dict) else None
+        if not logs or not isinstance(logs, list):
+            return request.make_json_response({"status": "error", "message": "No logs provided"}, status=400)
+        if not all(isinstance(log, dict) for log in logs):
+            return request.make_json_response({"status": "error", "message": "Logs must be JSON objects"}, status=400)
 
+        try:
+            request.env['fingerprint.push.queue'].sudo()._enqueue(logs)
         except Exception as e:
             _logger.error("Error in real-time attendance push: %s", str(e))
-            return {"status": "error", "message": str(e)}
+            return request.make_json_response({"status": "error", "message": str(e)}, status=500)
+
+        return request.make_json_response({"status": "queued", "message": f"Queued {len(logs)} logs"}, status=202)
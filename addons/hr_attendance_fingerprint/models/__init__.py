@@ -1,3 +1,9 @@
 from . import hr_employee
 from . import hr_attendance
+from . import fingerprint_log_key
+from . import fingerprint_employee_lock
 from . import res_config_settings
+from . import fingerprint_log_quarantine
+from . import fingerprint_push_queue
+from . import fingerprint_sync_run
+from . import fingerprint_device
@@ -0,0 +1,333 @@
+from odoo import models, fields, api, _
+import requests
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+_logger = logging.getLogger(__name__)
+
+# Slack on the sync interval, the cron starts up to a polling period late
+SYNC_DUE_TOLERANCE = timedelta(minutes=2)
+
+# One pooled HTTP session per sync worker thread
+_thread_local = threading.local()
+
+def _get_http_session():
+    session = getattr(_thread_local, 'session', None)
+    if session is None:
+        session = _thread_local.session = requests.Session()
+    return session
+
+class _CountingReader:
+    """File-like wrapper counting the bytes read from a streamed response"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self.raw.read(size)
+        self.size += len(data)
+        return data
+
+class FingerprintDevice(models.Model):
+    _name = 'fingerprint.device'
+    _description = 'Fingerprint Device'
+    _order = 'name'
+
+    name = fields.Char(string='Device Name', required=True)
+    active = fields.Boolean(default=True)
+    company_id = fields.Many2one('res.company', string='Company', default=lambda self: self.env.company,
+                                 help="Company whose employees punch on this device. Leave empty for a device "
+                                      "shared by several companies whose Fingerprint IDs do not overlap.")
+    api_url = fields.Char(string='API URL', required=True, help="Endpoint URL to fetch attendance logs (JSON format)")
+    api_key = fields.Char(string='API Key', help="API Key value for authentication")
+    api_key_header = fields.Char(string='API Key Header Name', default='x-api-key',
+                                 help="The header name for the API Key (e.g., x-api-key, Authorization, etc.)")
+    api_timezone = fields.Selection(
+        [
+            ('UTC', 'UTC'),
+            ('Asia/Jakarta', 'WIB (GMT+7)'),
+            ('Asia/Makassar', 'WITA (GMT+8)'),
+            ('Asia/Jayapura', 'WIT (GMT+9)'),
+        ],
+        string='API Timezone', default='Asia/Makassar', required=True,
+        help="The timezone used by the device. Use Asia/Makassar for WITA."
+    )
+    type_check_in = fields.Integer(string='Check-In Type Value', default=0,
+                                   help="The 'type' value from API that represents a Check-In")
+    type_check_out = fields.Integer(string='Check-Out Type Value', default=1,
+                                    help="The 'type' value from API that represents a Check-Out")
+    sync_interval = fields.Integer(string='Sync Interval (Minutes)', default=60,
+                                   help="Minimum time between two polls of this device")
+    cursor_param = fields.Char(string='Cursor Parameter', default='since',
+                               help="Query parameter used to ask the API only for logs newer than the last synced one")
+    cursor_field = fields.Selection(
+        [
+            ('timestamp', 'Timestamp'),
+            ('id', 'Log ID'),
+        ],
+        string='Cursor Field', default='timestamp', required=True,
+        help="Log field whose latest value is sent as the cursor on the next sync"
+    )
+    sync_cursor = fields.Char(string='Last Synced Cursor',
+                              help="High-water mark of the last committed sync. Clear it to re-fetch the full history.")
+    last_sync_date = fields.Datetime(string='Last Sync', readonly=True, help="Start of the last sync")
+    last_sync_state = fields.Selection([
+        ('done', 'Success'),
+        ('failed', 'Failed'),
+    ], string='Last Sync Status', readonly=True)
+    last_sync_message = fields.Char(string='Last Sync Message', readonly=True)
+
+    @api.model
+    def _cron_sync_devices(self):
+        """Poll every due device concurrently.
+
+        Devices are synced by a bounded thread pool, each one with its own
+        cursor and transaction, so the run takes as long as the slowest
+        device rather than the sum of all of them.
+        """
+        self._migrate_legacy_settings()
+        # Compared with the start of the previous sync, so that an interval
+        # equal to the cron period does not skip every other run
+        due_date = fields.Datetime.now() + SYNC_DUE_TOLERANCE
+        devices = self.search([]).filtered(
+            lambda d: not d.last_sync_date or d.last_sync_date + timedelta(minutes=d.sync_interval) <= due_date
+        )
+        if not devices:
+            return
+
+        config = self.env['ir.config_parameter'].sudo()
+        max_workers = max(1, int(config.get_param('hr_attendance_fingerprint.sync_workers') or 4))
+        # Release our snapshot/locks before the workers start writing
+        self.env.cr.commit()
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(devices))) as executor:
+            futures = {executor.submit(self._sync_device_in_thread, device.id): device.name for device in devices}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    _logger.error("Fingerprint sync of %s crashed: %s", futures[future], str(e))
+
+    def _sync_device_in_thread(self, device_id):
+        threading.current_thread().dbname = self.env.cr.dbname
+        with self.env.registry.cursor() as cr:
+            device = self.with_env(self.env(cr=cr)).browse(device_id)
+            device._sync(_get_http_session())
+
+    def action_sync_now(self):
+        with requests.Session() as session:
+            for device in self:
+                device._sync(session)
+
+    def _sync(self, session):
+        """Fetch and ingest the new logs of this device, committing chunk by
+        chunk, and record the run in ``fingerprint.sync.run``"""
+        self.ensure_one()
+        config = self.env['ir.config_parameter'].sudo()
+        chunk_size = int(config.get_param('hr_attendance_fingerprint.chunk_size') or 1000)
+        Attendance = self.env['hr.attendance'].sudo()
+        SyncRun = self.env['fingerprint.sync.run']
+        cursor = self.sync_cursor
+
+        _logger.info("Starting fingerprint attendance sync of %s from %s (cursor: %s)", self.name, self.api_url, cursor or 'none')
+        headers = {}
+        if self.api_key:
+            headers[self.api_key_header or 'x-api-key'] = self.api_key
+
+        # Only ask the device for punches newer than the last committed batch
+        params = {}
+        if cursor:
+            params[self.cursor_param or 'since'] = cursor
+
+        start_date = fields.Datetime.now()
+        started = time.monotonic()
+        metrics = {'fetch_time': 0.0, 'payload_size': 0}
+        totals = SyncRun._new_counters()
+        db_time = 0.0
+        chunk_count = 0
+        error = False
+        try:
+            for logs in self._fetch_fingerprint_log_chunks(session, self.api_url, headers, params, chunk_size, metrics):
+                chunk_count += 1
+                db_started = time.monotonic()
+                stats = Attendance.with_context(fingerprint_device_id=self.id)._process_attendance_logs_retrying(
+                    logs, self.type_check_in, self.type_check_out, self.api_timezone)
+
+                # Advance the high-water mark in the same transaction as the chunk
+                new_cursor = self._get_logs_high_water_mark(logs, self.cursor_field, cursor)
+                if new_cursor and new_cursor != cursor:
+                    self.sync_cursor = cursor = new_cursor
+                self.env.cr.commit()
+                db_time += time.monotonic() - db_started
+                SyncRun._add_counters(totals, stats)
+        except Exception as e:
+            self.env.cr.rollback()
+            _logger.error("Failed to sync fingerprint device %s: %s", self.name, str(e))
+            error = str(e)
+
+        if not error:
+            _logger.info("Processed %d logs from %s", totals['received'], self.name)
+        self.write({
+            'last_sync_date': start_date,
+            'last_sync_state': 'failed' if error else 'done',
+            'last_sync_message': error or _("%s logs received", totals['received']),
+        })
+        SyncRun._record({
+            'device_id': self.id,
+            'source': 'pull',
+            'start_date': start_date,
+            'state': 'failed' if error else 'done',
+            'error': error,
+            'duration': time.monotonic() - started,
+            'fetch_time': metrics['fetch_time'],
+            'db_time': db_time,
+            'payload_size': metrics['payload_size'],
+            'chunk_count': chunk_count,
+        }, totals)
+        self.env.cr.commit()
+
+    @api.model
+    def _migrate_legacy_settings(self):
+        """Turn the former single-endpoint settings into a device record"""
+        config = self.env['ir.config_parameter'].sudo()
+        api_url = config.get_param('hr_attendance_fingerprint.api_url')
+        if not api_url or self.with_context(active_test=False).search_count([]):
+            return
+        self.create({
+            'name': api_url,
+            'api_url': api_url,
+            'api_key': config.get_param('hr_attendance_fingerprint.api_key'),
+            'api_key_header': config.get_param('hr_attendance_fingerprint.api_key_header') or 'x-api-key',
+            'api_timezone': config.get_param('hr_attendance_fingerprint.api_timezone') or 'Asia/Makassar',
+            'type_check_in': int(config.get_param('hr_attendance_fingerprint.type_check_in') or 0),
+            'type_check_out': int(config.get_param('hr_attendance_fingerprint.type_check_out') or 1),
+            'cursor_param': config.get_param('hr_attendance_fingerprint.cursor_param') or 'since',
+            'cursor_field': config.get_param('hr_attendance_fingerprint.cursor_field') or 'timestamp',
+            'sync_cursor': config.get_param('hr_attendance_fingerprint.sync_cursor'),
+        })
+        config.set_param('hr_attendance_fingerprint.api_url', False)
+
+    @api.model
+    def _fetch_fingerprint_log_chunks(self, session, api_url, headers=None, params=None, chunk_size=1000, metrics=None):
+        """Yield the logs returned by the fingerprint API in lists of at most
+        ``chunk_size`` entries.
+
+        Pagination is followed through the ``Link: <...>; rel="next"`` header
+        or a ``next`` URL in the JSON body. When ``ijson`` is installed each
+        page is parsed incrementally, so memory is bounded by the chunk size
+        instead of the size of the response. Pages are expected in
+        chronological order, logs are only sorted within a chunk.
+
+        When a ``metrics`` dict is given, the time spent inside the generator
+        (requests and decoding, not the caller's processing) is added to its
+        ``fetch_time`` key and the decoded payload size to ``payload_size``.
+        """
+        if metrics is None:
+            metrics = {}
+        metrics.setdefault('fetch_time', 0.0)
+        metrics.setdefault('payload_size', 0)
+        visited = set()
+        url = api_url
+        chunk = []
+        started = time.monotonic()
+        if not ijson:
+            _logger.warning("ijson is not installed: fingerprint API pages are decoded whole, "
+                            "memory grows with the size of each page")
+        while url and url not in visited:
+            visited.add(url)
+            page = {}
+            with session.get(url, headers=headers, params=params, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                if ijson:
+                    logs = self._iter_streamed_logs(response, page)
+                else:
+                    page['size'] = len(response.content)
+                    logs = self._extract_logs(response.json(), page)
+                for log in logs:
+                    chunk.append(log)
+                    if len(chunk) >= chunk_size:
+                        metrics['fetch_time'] += time.monotonic() - started
+                        yield chunk
+                        started = time.monotonic()
+                        chunk = []
+                url = page.get('next') or response.links.get('next', {}).get('url')
+                metrics['payload_size'] += page.get('size', 0)
+            # Follow-up URLs already carry their own query string
+            params = None
+        metrics['fetch_time'] += time.monotonic() - started
+        if chunk:
+            yield chunk
+
+    @api.model
+    def _extract_logs(self, result, page):
+        """Return the log list of a decoded API page, storing its next link in ``page``"""
+        if isinstance(result, list):
+            return result
+        if not isinstance(result, dict):
+            return []
+        if isinstance(result.get('next'), str):
+            page['next'] = result['next']
+        # The actual logs are in the 'rows' key based on provided JSON
+        if 'rows' in result:
+            return result['rows'] or []
+        if 'data' in result:
+            return result['data'] or []
+        _logger.warning("API response doesn't have 'rows' or 'data' keys.")
+        return []
+
+    @api.model
+    def _iter_streamed_logs(self, response, page):
+        """Incrementally decode the logs of a streamed API page with ijson.
+
+        The number of bytes read is stored in ``page['size']`` once the page
+        is exhausted.
+        """
+        # Let urllib3 undo any gzip/deflate transfer encoding while streaming
+        response.raw.decode_content = True
+        reader = _CountingReader(response.raw)
+        builder = None
+        for prefix, event, value in ijson.parse(reader):
+            if builder is not None:
+                if prefix == item_prefix and event in ('end_map', 'end_array'):
+                    builder.event(event, value)
+                    yield builder.value
+                    builder = None
+                else:
+                    builder.event(event, value)
+            elif prefix in ('item', 'rows.item', 'data.item') and event == 'start_map':
+                item_prefix = prefix
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+            elif prefix == 'next' and event == 'string':
+                page['next'] = value
+        page['size'] = reader.size
+
+    @api.model
+    def _get_logs_high_water_mark(self, logs, cursor_field='timestamp', current=None):
+        """Return the cursor value of the newest log in ``logs``, never
+        lower than ``current``.
+
+        ``cursor_field`` is either 'timestamp' (raw API timestamp string) or
+        'id' (external log id, compared numerically when possible).
+        """
+        if cursor_field == 'id':
+            values = [str(log.get('external_log_id') or log.get('id') or '') for log in logs]
+            values = [value for value in values + [current or ''] if value]
+            if not values:
+                return False
+            if all(value.isdigit() for value in values):
+                return max(values, key=int)
+            return max(values)
+
+        values = [log.get('timestamp') or log.get('datetime') for log in logs]
+        values = [value for value in values + [current] if value]
+        return max(values) if values else False
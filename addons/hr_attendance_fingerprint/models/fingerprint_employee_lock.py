@@ -0,0 +1,13 @@
+from odoo import models, fields
+
+class FingerprintEmployeeLock(models.Model):
+    _name = 'fingerprint.employee.lock'
+    _description = 'Fingerprint Ingestion Lock'
+    _log_access = False
+
+    employee_id = fields.Many2one('hr.employee', string='Employee', required=True, ondelete='cascade')
+    version = fields.Integer(string='Version', default=1, help="Bumped by every ingestion touching the employee")
+
+    _sql_constraints = [
+        ('employee_uniq', 'unique(employee_id)', 'Only one lock row per employee!')
+    ]
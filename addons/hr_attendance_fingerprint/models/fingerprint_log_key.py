@@ -0,0 +1,65 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+class FingerprintLogKey(models.Model):
+    _name = 'fingerprint.log.key'
+    _description = 'Processed Fingerprint Log Key'
+    _log_access = False
+
+    device_sn = fields.Char(string='Device SN', required=True, default='')
+    external_id = fields.Char(string='External Log ID', required=True)
+    attendance_id = fields.Many2one('hr.attendance', string='Attendance', required=True, index=True, ondelete='cascade')
+
+    _sql_constraints = [
+        ('device_external_uniq', 'unique(device_sn, external_id)', 'A fingerprint log can only be processed once per device!')
+    ]
+
+    def init(self):
+        # Backfill keys of attendances synced before this table existed
+        self.env.cr.execute("SELECT 1 FROM fingerprint_log_key LIMIT 1")
+        if self.env.cr.fetchone():
+            return
+        self.env.cr.execute("""
+            INSERT INTO fingerprint_log_key (device_sn, external_id, attendance_id)
+            SELECT COALESCE(a.device_sn, ''), ext.external_id, a.id
+              FROM hr_attendance a,
+                   LATERAL (VALUES (a.external_log_id), (a.ext_in_id), (a.ext_out_id)) AS ext(external_id)
+             WHERE ext.external_id IS NOT NULL AND ext.external_id != ''
+            ON CONFLICT (device_sn, external_id) DO NOTHING
+        """)
+
+    @api.model
+    def _normalize_device_sn(self, device_sn):
+        return str(device_sn or '')
+
+    @api.model
+    def _get_existing_keys(self, keys):
+        """Return the subset of ``(device_sn, external_id)`` pairs already processed"""
+        if not keys:
+            return set()
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT device_sn, external_id FROM fingerprint_log_key
+             WHERE (device_sn, external_id) IN %s
+        """, (tuple(keys),))
+        return set(self.env.cr.fetchall())
+
+    @api.model
+    def _claim_keys(self, rows):
+        """Insert ``(device_sn, external_id, attendance_id)`` rows.
+
+        Raises when one of the keys was registered in the meantime by a
+        concurrent transaction, so that the caller's savepoint is rolled back
+        and the logs are replayed against the committed state.
+        """
+        if not rows:
+            return
+        device_sns, external_ids, attendance_ids = zip(*rows)
+        self.env.cr.execute("""
+            INSERT INTO fingerprint_log_key (device_sn, external_id, attendance_id)
+            SELECT * FROM unnest(%s::varchar[], %s::varchar[], %s::int[])
+            ON CONFLICT (device_sn, external_id) DO NOTHING
+            RETURNING id
+        """, (list(device_sns), list(external_ids), list(attendance_ids)))
+        if len(self.env.cr.fetchall()) != len(rows):
+            raise UserError(_("Some fingerprint logs were processed concurrently by another worker."))
@@ -0,0 +1,74 @@
+from odoo import models, fields, api, _
+import json
+import logging
+
+_logger = logging.getLogger(__name__)
+
+class FingerprintLogQuarantine(models.Model):
+    _name = 'fingerprint.log.quarantine'
+    _description = 'Quarantined Fingerprint Log'
+    _order = 'id desc'
+
+    external_log_id = fields.Char(string='External Log ID', index=True)
+    fid = fields.Char(string='Fingerprint ID')
+    log_timestamp = fields.Char(string='Log Timestamp')
+    device_sn = fields.Char(string='Device SN')
+    device_id = fields.Many2one('fingerprint.device', string='Device', ondelete='set null')
+    # Settings the log was parsed with, reused on retry
+    type_check_in = fields.Integer(string='Check-In Type Value')
+    type_check_out = fields.Integer(string='Check-Out Type Value')
+    api_timezone = fields.Char(string='API Timezone')
+    payload = fields.Text(string='Raw Log', help="Log as received from the API, in JSON")
+    error = fields.Text(string='Error')
+    state = fields.Selection([
+        ('quarantined', 'Quarantined'),
+        ('resolved', 'Resolved'),
+    ], string='Status', default='quarantined', required=True)
+
+    @api.model
+    def _quarantine_logs(self, failures, type_in=0, type_out=1, api_tz_name='Asia/Makassar'):
+        """Store ``(log, error)`` pairs that could not be ingested, with the
+        type mapping and timezone they were parsed with"""
+        self.create([{
+            'external_log_id': str(log.get('external_log_id') or log.get('id') or ''),
+            'fid': str(log.get('user_id') or ''),
+            'log_timestamp': log.get('timestamp') or log.get('datetime'),
+            'device_sn': log.get('device_sn'),
+            'payload': json.dumps(log, default=str),
+            'error': error,
+            'device_id': self.env.context.get('fingerprint_device_id'),
+            'type_check_in': type_in,
+            'type_check_out': type_out,
+            'api_timezone': api_tz_name,
+        } for log, error in failures])
+        _logger.warning("Quarantined %d fingerprint logs", len(failures))
+
+    def action_retry(self):
+        """Run the selected logs through the ingestion again, with the
+        settings they were first parsed with"""
+        config = self.env['ir.config_parameter'].sudo()
+        default_in = int(config.get_param('hr_attendance_fingerprint.type_check_in') or 0)
+        default_out = int(config.get_param('hr_attendance_fingerprint.type_check_out') or 1)
+        default_tz = config.get_param('hr_attendance_fingerprint.api_timezone') or 'Asia/Makassar'
+        Attendance = self.env['hr.attendance'].sudo()
+
+        for record in self.filtered(lambda r: r.state == 'quarantined').sorted('log_timestamp'):
+            if record.api_timezone:
+                settings = (record.type_check_in, record.type_check_out, record.api_timezone)
+            elif record.device_id:
+                device = record.device_id
+                settings = (device.type_check_in, device.type_check_out, device.api_timezone)
+            else:
+                # Quarantined before the settings were stored
+                settings = (default_in, default_out, default_tz)
+            try:
+                with self.env.cr.savepoint():
+                    malformed = Attendance.with_context(fingerprint_device_id=record.device_id.id)._process_attendance_chunk(
+                        [json.loads(record.payload)], *settings)
+            except Exception as e:
+                record.error = str(e)
+                continue
+            if malformed:
+                record.error = malformed[0][1]
+            else:
+                record.state = 'resolved'
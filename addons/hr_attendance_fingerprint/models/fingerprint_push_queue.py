@@ -0,0 +1,116 @@
+from odoo import models, fields, api, _
+import json
+import logging
+import time
+from datetime import timedelta
+
+from .hr_attendance import CONCURRENCY_ERRORS
+
+_logger = logging.getLogger(__name__)
+
+class FingerprintPushQueue(models.Model):
+    _name = 'fingerprint.push.queue'
+    _description = 'Pushed Fingerprint Payload'
+    _order = 'id'
+
+    payload = fields.Text(string='Logs', required=True, help="Pushed logs, as a JSON list")
+    log_count = fields.Integer(string='Logs Count')
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='pending', required=True, index=True)
+    error = fields.Text(string='Error')
+    processed_date = fields.Datetime(string='Processed On')
+
+    @api.model
+    def _enqueue(self, logs):
+        """Stage pushed logs and wake up the queue worker"""
+        entry = self.create({
+            'payload': json.dumps(logs),
+            'log_count': len(logs),
+        })
+        cron = self.env.ref('hr_attendance_fingerprint.ir_cron_process_push_queue', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+        return entry
+
+    @api.model
+    def _cron_process_push_queue(self, batch_size=None):
+        """Drain pending payloads in batches, committing after each batch.
+
+        Rows are claimed with ``FOR UPDATE SKIP LOCKED`` so several workers
+        can drain the queue side by side. A run that handled any payload is
+        recorded in ``fingerprint.sync.run``.
+        """
+        config = self.env['ir.config_parameter'].sudo()
+        type_in = int(config.get_param('hr_attendance_fingerprint.type_check_in') or 0)
+        type_out = int(config.get_param('hr_attendance_fingerprint.type_check_out') or 1)
+        api_tz_name = config.get_param('hr_attendance_fingerprint.api_timezone') or 'Asia/Makassar'
+        batch_size = batch_size or int(config.get_param('hr_attendance_fingerprint.push_batch_size') or 50)
+        Attendance = self.env['hr.attendance'].sudo()
+        SyncRun = self.env['fingerprint.sync.run']
+
+        start_date = fields.Datetime.now()
+        started = time.monotonic()
+        totals = SyncRun._new_counters()
+        db_time = 0.0
+        payload_size = 0
+        chunk_count = 0
+        error = False
+        while True:
+            self.env.cr.execute("""
+                SELECT id FROM fingerprint_push_queue
+                 WHERE state = 'pending'
+                 ORDER BY id
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+            """, (batch_size,))
+            entries = self.browse([row[0] for row in self.env.cr.fetchall()])
+            if not entries:
+                break
+
+            logs = []
+            for entry in entries:
+                payload_size += len(entry.payload)
+                logs += json.loads(entry.payload)
+            chunk_count += 1
+            db_started = time.monotonic()
+            try:
+                stats = Attendance._process_attendance_logs(logs, type_in, type_out, api_tz_name)
+                entries.write({'state': 'done', 'processed_date': fields.Datetime.now()})
+                SyncRun._add_counters(totals, stats)
+            except CONCURRENCY_ERRORS as e:
+                # Leave the batch pending, it is picked up again on the next run
+                _logger.info("Pushed fingerprint logs collided with another worker (%s), postponing", str(e))
+                self.env.cr.rollback()
+                break
+            except Exception as e:
+                _logger.error("Failed to process pushed fingerprint logs: %s", str(e))
+                self.env.cr.rollback()
+                entries.write({'state': 'failed', 'error': str(e), 'processed_date': fields.Datetime.now()})
+                error = str(e)
+            self.env.cr.commit()
+            db_time += time.monotonic() - db_started
+
+        if chunk_count:
+            SyncRun._record({
+                'source': 'push',
+                'start_date': start_date,
+                'state': 'failed' if error else 'done',
+                'error': error,
+                'duration': time.monotonic() - started,
+                'db_time': db_time,
+                'payload_size': payload_size,
+                'chunk_count': chunk_count,
+            }, totals)
+            self.env.cr.commit()
+
+        # Keep processed payloads for a week for troubleshooting
+        self.search([
+            ('state', '=', 'done'),
+            ('processed_date', '<', fields.Datetime.now() - timedelta(days=7)),
+        ]).unlink()
+
+    def action_requeue(self):
+        self.write({'state': 'pending', 'error': False})
@@ -0,0 +1,61 @@
+from odoo import models, fields, api, _
+import logging
+from datetime import timedelta
+
+_logger = logging.getLogger(__name__)
+
+# Counters returned by hr.attendance._process_attendance_logs, stored as log_<name>
+RUN_COUNTERS = ('received', 'deduped', 'unknown_fid', 'created', 'paired', 'failed')
+
+class FingerprintSyncRun(models.Model):
+    _name = 'fingerprint.sync.run'
+    _description = 'Fingerprint Sync Run'
+    _order = 'start_date desc, id desc'
+    _rec_name = 'start_date'
+
+    device_id = fields.Many2one('fingerprint.device', string='Device', index=True, ondelete='cascade')
+    source = fields.Selection([
+        ('pull', 'Device Sync'),
+        ('push', 'Push Queue'),
+    ], string='Source', required=True, default='pull')
+    start_date = fields.Datetime(string='Started On', required=True, default=fields.Datetime.now)
+    state = fields.Selection([
+        ('done', 'Success'),
+        ('failed', 'Failed'),
+    ], string='Status', required=True, default='done')
+    error = fields.Text(string='Error')
+    duration = fields.Float(string='Duration (s)', digits=(16, 3))
+    fetch_time = fields.Float(string='Fetch Time (s)', digits=(16, 3),
+                              help="Time spent waiting on and decoding the API responses")
+    db_time = fields.Float(string='Database Time (s)', digits=(16, 3),
+                           help="Time spent ingesting the logs and committing")
+    payload_size = fields.Integer(string='Payload Size (bytes)')
+    chunk_count = fields.Integer(string='Chunks')
+    log_received = fields.Integer(string='Logs Received')
+    log_deduped = fields.Integer(string='Already Ingested')
+    log_unknown_fid = fields.Integer(string='Unknown FID')
+    log_created = fields.Integer(string='Attendances Created')
+    log_paired = fields.Integer(string='Check-outs Paired')
+    log_failed = fields.Integer(string='Quarantined')
+
+    @api.model
+    def _new_counters(self):
+        return dict.fromkeys(RUN_COUNTERS, 0)
+
+    @api.model
+    def _add_counters(self, totals, stats):
+        """Accumulate the stats of one ``_process_attendance_logs`` call"""
+        for key in RUN_COUNTERS:
+            totals[key] += stats.get(key) or 0
+        return totals
+
+    @api.model
+    def _record(self, vals, totals):
+        """Store a run from its timings and accumulated counters"""
+        vals = dict(vals, **{'log_%s' % key: totals.get(key) or 0 for key in RUN_COUNTERS})
+        return self.sudo().create(vals)
+
+    @api.autovacuum
+    def _gc_sync_runs(self):
+        """Keep three months of telemetry"""
+        self.sudo().search([('start_date', '<', fields.Datetime.now() - timedelta(days=90))]).unlink()
@@ -1,11 +1,15 @@
 from odoo import models, fields, api, _
-import requests
 import logging
-from datetime import datetime
-import pytz
+from collections import defaultdict
+from psycopg2 import errors
+
+from ..tools import parse_log_timestamps, pair_events, CHECK_IN, CHECK_OUT
 
 _logger = logging.getLogger(__name__)
 
+# Errors meaning another worker ingested the same employees concurrently
+CONCURRENCY_ERRORS = (errors.SerializationFailure, errors.DeadlockDetected)
+
 class HrAttendance(models.Model):
     _inherit = 'hr.attendance'
 
@@ -18,160 +22,296 @@ class HrAttendance(models.Model):
 
     @api.model
     def _cron_sync_fingerprint_attendance(self):
-        config = self.env['ir.config_parameter'].sudo()
-        api_url = config.get_param('hr_attendance_fingerprint.api_url')
-        api_key = config.get_param('hr_attendance_fingerprint.api_key')
-        api_key_header = config.get_param('hr_attendance_fingerprint.api_key_header') or 'x-api-key'
-        type_in = int(config.get_param('hr_attendance_fingerprint.type_check_in') or 0)
-        type_out = int(config.get_param('hr_attendance_fingerprint.type_check_out') or 1)
-        api_tz_name = config.get_param('hr_attendance_fingerprint.api_timezone') or 'Asia/Makassar'
-        
-        if not api_url:
-            _logger.warning("Fingerprint API URL is not configured.")
-            return
-
-        try:
-            _logger.info("Starting fingerprint attendance sync from %s", api_url)
-            headers = {}
-            if api_key:
-                headers[api_key_header] = api_key
-            
-            response = requests.get(api_url, headers=headers, timeout=30)
-            response.raise_for_status()
-            result = response.json()
-            
-            _logger.info("Fingerprint API Response received. Total records: %s", result.get('total'))
-            
-            # The actual logs are in the 'rows' key based on provided JSON
-            logs = []
-            if isinstance(result, dict):
-                if 'rows' in result:
-                    logs = result['rows']
-                elif 'data' in result:
-                    logs = result['data']
-                else:
-                    _logger.warning("API response doesn't have 'rows' or 'data' keys. Using raw result if it's a list.")
-                    if isinstance(result, list):
-                        logs = result
-
-            if not logs:
-                _logger.info("No logs found in the API response.")
-                return
-
-            _logger.info("Processing %d logs from API", len(logs))
-            self._process_attendance_logs(logs, type_in, type_out, api_tz_name)
-        except Exception as e:
-            _logger.error("Failed to sync fingerprint attendance: %s", str(e))
+        self.env['fingerprint.device']._cron_sync_devices()
 
     @api.model
-    def _process_attendance_logs(self, logs, type_in=0, type_out=1, api_tz_name='Asia/Makassar'):
-        Employee = self.env['hr.employee'].sudo()
-        Attendance = self.env['hr.attendance'].sudo()
-        
-        api_tz = pytz.timezone(api_tz_name)
+    def _process_attendance_logs(self, logs, type_in=0, type_out=1, api_tz_name='Asia/Makassar', chunk_size=None):
+        """Ingest fingerprint logs chunk by chunk.
+
+        Every chunk runs under its own savepoint. When a chunk fails, its
+        logs are replayed one by one so that only the offending logs end up
+        in ``fingerprint.log.quarantine`` while the rest of the run keeps its
+        work.
+
+        Returns the run counters (logs received, deduplicated, created,
+        paired, failed, unknown FIDs...), logged once per call rather than
+        per chunk.
+        """
+        if not chunk_size:
+            config = self.env['ir.config_parameter'].sudo()
+            chunk_size = int(config.get_param('hr_attendance_fingerprint.chunk_size') or 1000)
 
         # Sort logs by timestamp ascending to process 'In' before 'Out'
         logs.sort(key=lambda x: x.get('timestamp') or x.get('datetime') or '')
 
+        stats = {
+            'received': len(logs),
+            'deduped': 0,
+            'created': 0,
+            'paired': 0,
+            'unmapped': 0,
+            'double_in': 0,
+            'orphan_out': 0,
+            'failed': 0,
+            'unknown_fid': 0,
+            'unknown_fids': set(),
+        }
+        failed = []
+        for start in range(0, len(logs), chunk_size):
+            chunk = logs[start:start + chunk_size]
+            try:
+                with self.env.cr.savepoint():
+                    failed += self._process_attendance_chunk(chunk, type_in, type_out, api_tz_name, stats)
+            except CONCURRENCY_ERRORS:
+                # Our snapshot is stale, replaying in this transaction cannot help
+                raise
+            except Exception as e:
+                _logger.warning("Fingerprint chunk of %d logs failed (%s), retrying log by log", len(chunk), str(e))
+                for log in chunk:
+                    try:
+                        with self.env.cr.savepoint():
+                            failed += self._process_attendance_chunk([log], type_in, type_out, api_tz_name, stats)
+                    except CONCURRENCY_ERRORS:
+                        raise
+                    except Exception as e:
+                        _logger.debug("Error processing log %s: %s", log.get('external_log_id') or log.get('id'), str(e))
+                        failed.append((log, str(e)))
+
+        stats['failed'] = len(failed)
+        if failed:
+            self.env['fingerprint.log.quarantine'].sudo()._quarantine_logs(failed, type_in, type_out, api_tz_name)
+        if stats['unknown_fid']:
+            _logger.warning("Skipped %d fingerprint logs with unknown FIDs: %s",
+                            stats['unknown_fid'], ', '.join(sorted(stats['unknown_fids'])))
+        _logger.info("Fingerprint logs processed: %(received)d received, %(deduped)d already ingested, "
+                     "%(created)d attendances created, %(paired)d check-outs paired, %(double_in)d double check-ins, "
+                     "%(orphan_out)d orphan check-outs, %(unmapped)d unmapped types, "
+                     "%(failed)d quarantined", stats)
+        return stats
+
+    @api.model
+    def _process_attendance_logs_retrying(self, logs, type_in=0, type_out=1, api_tz_name='Asia/Makassar', attempts=3):
+        """Run ``_process_attendance_logs``, restarting the transaction when a
+        concurrent worker ingested punches of the same employees.
+
+        The caller owns the transaction and commits on success; meant for
+        crons only since it rolls back on conflicts.
+        """
+        for attempt in range(1, attempts + 1):
+            try:
+                return self._process_attendance_logs(logs, type_in, type_out, api_tz_name)
+            except CONCURRENCY_ERRORS as e:
+                self.env.cr.rollback()
+                if attempt == attempts:
+                    raise
+                _logger.info("Concurrent fingerprint ingestion detected (%s), retrying (%d/%d)", str(e), attempt, attempts)
+
+    @api.model
+    def _lock_fingerprint_employees(self, employee_ids):
+        """Serialize fingerprint ingestion per employee.
+
+        Transaction-level advisory locks are taken in id order, so workers
+        ingesting overlapping employees queue up instead of deadlocking.
+        As transactions run in REPEATABLE READ, a worker that had to wait
+        still reads a snapshot taken before the other one committed: bumping
+        the per-employee version row then raises a serialization failure,
+        which the caller handles by retrying in a fresh transaction.
+        """
+        if not employee_ids:
+            return
+        employee_ids = sorted(employee_ids)
+        self.env.cr.execute("""
+            SELECT pg_advisory_xact_lock(hashtext('hr_attendance_fingerprint'), s.id)
+              FROM (SELECT unnest(%s::int[]) AS id ORDER BY 1) AS s
+             ORDER BY s.id
+        """, (employee_ids,))
+        self.env.cr.execute("""
+            INSERT INTO fingerprint_employee_lock (employee_id, version)
+            SELECT unnest(%s::int[]), 1
+            ON CONFLICT (employee_id) DO UPDATE SET version = fingerprint_employee_lock.version + 1
+        """, (employee_ids,))
+
+    @api.model
+    def _prepare_fingerprint_entries(self, logs, api_tz_name='Asia/Makassar'):
+        """Validate raw logs and convert their timestamps to naive UTC.
+
+        Returns ``(entries, malformed)``: ``(ext_id, fid, log_time_str, log,
+        check_time)`` tuples in the order of ``logs`` and the rejected
+        ``(log, error)`` pairs.
+        """
+        malformed = []
+        entries = []
         for log in logs:
             ext_id = str(log.get('external_log_id') or log.get('id') or '')
             fid = str(log.get('user_id') or '')
             log_time_str = log.get('timestamp') or log.get('datetime')
-            raw_type = log.get('type') # 0=Check In, 1=Check Out
-            device_name = log.get('device_name')
-            device_sn = log.get('device_sn')
 
             if not ext_id or not fid or not log_time_str:
-                _logger.warning("Skipping invalid log (missing required fields): %s", log)
+                _logger.debug("Skipping invalid log (missing required fields): %s", log)
+                malformed.append((log, "Missing required fields (id, user_id, timestamp)"))
                 continue
+            entries.append((ext_id, fid, log_time_str, log))
+
+        # Parse and convert all timestamps in one pass, rejecting malformed rows up front
+        check_times, parse_errors = parse_log_timestamps([entry[2] for entry in entries], api_tz_name)
+        for index, error in parse_errors.items():
+            _logger.debug("Error processing log %s: %s", entries[index][0], error)
+            malformed.append((entries[index][3], error))
+        entries = [entry + (check_time,) for entry, check_time in zip(entries, check_times) if check_time is not None]
+        return entries, malformed
 
-            # Check if this log has already been processed
-            existing = Attendance.search([
-                '|', ('external_log_id', '=', ext_id),
-                '|', ('ext_in_id', '=', ext_id),
-                ('ext_out_id', '=', ext_id)
-            ], limit=1)
-            
-            if existing:
+    @api.model
+    def _pair_fingerprint_entries(self, entries, employee_by_fid, open_by_employee, seen_keys, type_in=0, type_out=1):
+        """Apply the in/out pairing rules of ``tools.pairing`` to parsed log
+        entries, without touching the database.
+
+        ``entries`` are ``(ext_id, fid, log_time_str, log, check_time)`` tuples,
+        ``open_by_employee`` maps employee ids to their open attendance
+        records and ``seen_keys`` holds the already processed ``(device_sn,
+        ext_id)`` keys; it is updated in place. Returns the attendance values
+        to create, the check-outs to write on existing records, the claimed
+        ``(device_sn, ext_id, target)`` keys and the run counters.
+        """
+        LogKey = self.env['fingerprint.log.key']
+        unknown_fids = []
+        deduped = 0
+        events = []
+        for ext_id, fid, log_time_str, log, check_time in entries:
+            log_key = (LogKey._normalize_device_sn(log.get('device_sn')), ext_id)
+            if log_key in seen_keys:
+                deduped += 1
                 continue
+            seen_keys.add(log_key)
 
-            # Find employee by FID
-            employee = Employee.search([('fid', '=', fid)], limit=1)
-            if not employee:
+            employee_id = employee_by_fid.get(fid)
+            if not employee_id:
+                unknown_fids.append(fid)
                 continue
 
-            try:
-                # 1. Parse string to naive datetime
-                # Handle ISO 8601 format and fallback
-                if 'T' in log_time_str:
-                    log_time_cleaned = log_time_str.replace('T', ' ').replace('Z', '').split('.')[0]
-                    naive_time = datetime.strptime(log_time_cleaned, '%Y-%m-%d %H:%M:%S')
-                else:
-                    naive_time = datetime.strptime(log_time_str, '%Y-%m-%d %H:%M:%S')
-                
-                # 2. Convert from API Timezone to UTC for Odoo storage
-                # We assume the time in API is LOCAL time (e.g. 14:50 WITA)
-                local_time = api_tz.localize(naive_time)
-                check_time = local_time.astimezone(pytz.UTC).replace(tzinfo=None)
-
-                _logger.info("Syncing %s: API Time %s (%s) -> Odoo UTC %s", 
-                             employee.name, naive_time, api_tz_name, check_time)
-
-                if raw_type == type_in: # Check In
-                    # Avoid creating multiple open attendances
-                    open_attendance = Attendance.search([
-                        ('employee_id', '=', employee.id),
-                        ('check_out', '=', False)
-                    ], limit=1)
-                    
-                    if not open_attendance:
-                        Attendance.create({
-                            'employee_id': employee.id,
-                            'check_in': check_time,
-                            'external_log_id': ext_id,
-                            'ext_in_id': ext_id,
-                            'device_name': device_name,
-                            'device_sn': device_sn,
-                            'raw_type': raw_type,
-                        })
-                        _logger.info("Created Check-In for %s at %s UTC", employee.name, check_time)
-
-                elif raw_type == type_out: # Check Out
-                    # Pair with the FIRST open attendance of the day (asc)
-                    open_attendance = Attendance.search([
-                        ('employee_id', '=', employee.id),
-                        ('check_out', '=', False)
-                    ], order='check_in asc', limit=1)
-                    
-                    if open_attendance:
-                        # Ensure check_out is after check_in
-                        if check_time >= open_attendance.check_in:
-                            open_attendance.write({
-                                'check_out': check_time,
-                                'ext_out_id': ext_id,
-                            })
-                            _logger.info("Updated Check-Out for %s at %s UTC", employee.name, check_time)
-                        else:
-                            open_attendance = False
-
-                    if not open_attendance:
-                        # Create direct Check-Out record
-                        Attendance.create({
-                            'employee_id': employee.id,
-                            'check_in': check_time,
-                            'check_out': check_time,
-                            'external_log_id': ext_id,
-                            'ext_out_id': ext_id,
-                            'device_name': device_name,
-                            'device_sn': device_sn,
-                            'raw_type': raw_type,
-                        })
-                        _logger.info("Created direct Check-Out for %s at %s UTC", employee.name, check_time)
-
-                else:
-                    _logger.info("Log raw_type %s does not match mapping. Skipping log %s.", raw_type, ext_id)
-                
-            except Exception as e:
-                _logger.error("Error processing log %s: %s", ext_id, str(e))
-                self.env.cr.rollback() # Rollback current entry transaction if failed
+            raw_type = log.get('type') # 0=Check In, 1=Check Out
+            if raw_type == type_in:
+                kind = CHECK_IN
+            elif raw_type == type_out:
+                kind = CHECK_OUT
+            else:
+                _logger.debug("Log raw_type %s does not match mapping. Skipping log %s.", raw_type, ext_id)
+                kind = None
+            events.append((employee_id, check_time, kind, (ext_id, log_key, log)))
+
+        attendances, pairing_stats = pair_events(events, {
+            employee_id: [(attendance.check_in, attendance) for attendance in attendances]
+            for employee_id, attendances in open_by_employee.items()
+        })
+
+        to_create = []
+        to_write = {}
+        # (device_sn, external_id, vals dict or attendance) claimed by this chunk
+        claimed_keys = []
+        for attendance in attendances:
+            if attendance.record is not None:
+                # Check-out of an attendance opened before this batch
+                ext_id, log_key, log = attendance.out_event
+                to_write[attendance.record] = {'check_out': attendance.check_out, 'ext_out_id': ext_id}
+                claimed_keys.append(log_key + (attendance.record,))
+                continue
+
+            ext_id, log_key, log = attendance.in_event or attendance.out_event
+            vals = {
+                'employee_id': attendance.employee_id,
+                'check_in': attendance.check_in,
+                'external_log_id': ext_id,
+                'device_name': log.get('device_name'),
+                'device_sn': log.get('device_sn'),
+                'raw_type': log.get('type'),
+            }
+            claimed_keys.append(log_key + (vals,))
+            if attendance.in_event:
+                vals['ext_in_id'] = ext_id
+            if attendance.out_event:
+                out_ext_id, out_log_key, out_log = attendance.out_event
+                vals.update({'check_out': attendance.check_out, 'ext_out_id': out_ext_id})
+                if attendance.in_event:
+                    claimed_keys.append(out_log_key + (vals,))
+            to_create.append(vals)
+
+        return dict(pairing_stats, **{
+            'to_create': to_create,
+            'to_write': to_write,
+            'claimed_keys': claimed_keys,
+            'unknown_fids': unknown_fids,
+            'deduped': deduped,
+        })
+
+    @api.model
+    def _process_attendance_chunk(self, logs, type_in=0, type_out=1, api_tz_name='Asia/Makassar', stats=None):
+        """Ingest a chunk of fingerprint logs sorted by timestamp.
+
+        Existing external ids, the FID -> employee map and the open
+        attendances are prefetched for the whole chunk, in/out events are
+        paired in memory and the result is flushed with grouped writes and
+        a single create. The outcome is the same as handling the logs one
+        by one in timestamp order.
+
+        Malformed logs are returned as ``(log, error)`` pairs, database errors
+        are raised to the caller. Counters are added to ``stats`` once the
+        chunk is flushed.
+        """
+        Attendance = self.env['hr.attendance'].sudo()
+
+        entries, malformed = self._prepare_fingerprint_entries(logs, api_tz_name)
+        if not entries:
+            return malformed
+
+        # 1. Map FID -> employee from the cached map of the device's company
+        device = self.env['fingerprint.device'].sudo().browse(self.env.context.get('fingerprint_device_id'))
+        employee_by_fid = self.env['hr.employee']._get_fid_employee_map(device.company_id.id)
+        employee_ids = list({employee_by_fid[entry[1]] for entry in entries if entry[1] in employee_by_fid})
+
+        # 2. Serialize concurrent workers (cron, push queue) per employee, so
+        # the dedupe probe and the open attendances below cannot go stale
+        self._lock_fingerprint_employees(employee_ids)
+
+        # 3. Prefetch already processed (device, external id) keys in one probe
+        LogKey = self.env['fingerprint.log.key'].sudo()
+        seen_keys = LogKey._get_existing_keys({
+            (LogKey._normalize_device_sn(log.get('device_sn')), ext_id) for ext_id, fid, log_time_str, log, check_time in entries
+        })
+
+        # 4. Open attendances per employee, the only state the pairing needs
+        open_by_employee = defaultdict(list)
+        if employee_ids:
+            for attendance in Attendance.search([
+                ('employee_id', 'in', employee_ids),
+                ('check_out', '=', False)
+            ], order='check_in asc'):
+                open_by_employee[attendance.employee_id.id].append(attendance)
+
+        # 5. Pair in/out events in memory, employee by employee
+        pairing = self._pair_fingerprint_entries(entries, employee_by_fid, open_by_employee, seen_keys, type_in, type_out)
+        to_create = pairing['to_create']
+        to_write = pairing['to_write']
+        claimed_keys = pairing['claimed_keys']
+
+        # 6. Flush: check-outs on existing records first, then one create
+        for attendance, vals in to_write.items():
+            attendance.write(vals)
+        created = Attendance.create(to_create) if to_create else Attendance
+        created_ids = {id(vals): record.id for vals, record in zip(to_create, created)}
 
+        # 7. Register the keys; the unique constraint rejects concurrent duplicates
+        LogKey._claim_keys([
+            (device_sn, ext_id, created_ids[id(target)] if isinstance(target, dict) else target.id)
+            for device_sn, ext_id, target in claimed_keys
+        ])
+        _logger.debug("Fingerprint chunk processed: %d logs, %d check-outs paired, %d attendances created",
+                      len(entries), pairing['paired'], len(to_create))
+        if stats is not None:
+            stats['deduped'] += pairing['deduped']
+            stats['created'] += len(to_create)
+            stats['paired'] += pairing['paired']
+            stats['unmapped'] += pairing['unmapped']
+            stats['double_in'] += pairing['double_in']
+            stats['orphan_out'] += pairing['orphan_out']
+            stats['unknown_fid'] += len(pairing['unknown_fids'])
+            stats['unknown_fids'].update(pairing['unknown_fids'])
+        return malformed
@@ -1,6 +1,61 @@
-from odoo import models, fields
+from odoo import models, fields, api, tools
+import logging
+
+_logger = logging.getLogger(__name__)
 
 class HrEmployee(models.Model):
     _inherit = 'hr.employee'
 
-    fid = fields.Char(string='Fingerprint ID', help="Mapping to user_id from Fingerprint API")
+    fid = fields.Char(string='Fingerprint ID', index=True, copy=False, help="Mapping to user_id from Fingerprint API")
+
+    _sql_constraints = [
+        ('fid_company_uniq', 'unique(fid, company_id)', 'Fingerprint ID must be unique per company!')
+    ]
+
+    @api.model
+    @tools.ormcache('company_id')
+    def _get_fid_employee_map(self, company_id=False):
+        """Return a ``{fid: employee_id}`` map of the active employees of
+        ``company_id``.
+
+        FIDs are only unique per company: without ``company_id`` the map
+        covers all companies and leaves out the FIDs used in several of them,
+        as their punches cannot be attributed.
+
+        Each worker caches the map in its own memory; assigning, changing or
+        removing a FID invalidates it in every worker. Treat it as read-only.
+        """
+        domain = [('fid', '!=', False)]
+        if company_id:
+            domain.append(('company_id', '=', company_id))
+        employee_by_fid = {}
+        ambiguous = set()
+        for row in self.sudo().search_read(domain, ['fid'], order='id'):
+            if employee_by_fid.setdefault(row['fid'], row['id']) != row['id']:
+                ambiguous.add(row['fid'])
+        if ambiguous:
+            _logger.warning("Fingerprint IDs used in several companies, set the company of their devices: %s",
+                            ', '.join(sorted(ambiguous)))
+        for fid in ambiguous:
+            del employee_by_fid[fid]
+        return employee_by_fid
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        employees = super().create(vals_list)
+        if any(vals.get('fid') for vals in vals_list):
+            self.env.registry.clear_cache()
+        return employees
+
+    def write(self, vals):
+        res = super().write(vals)
+        if any(key in vals for key in ('fid', 'active', 'company_id')):
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        has_fid = any(self.mapped('fid'))
+        res = super().unlink()
+        if has_fid:
+            self.env.registry.clear_cache()
+        return res
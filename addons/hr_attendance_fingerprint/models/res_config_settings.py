@@ -3,33 +3,17 @@ from odoo import models, fields
 class ResConfigSettings(models.TransientModel):
     _inherit = 'res.config.settings'
 
-    fingerprint_api_url = fields.Char(
-        string='Fingerprint API URL',
-        config_parameter='hr_attendance_fingerprint.api_url',
-        help="Endpoint URL to fetch attendance logs (JSON format)"
-    )
-    fingerprint_api_key = fields.Char(
-        string='Fingerprint API Key',
-        config_parameter='hr_attendance_fingerprint.api_key',
-        help="API Key value for authentication"
-    )
-    fingerprint_api_key_header = fields.Char(
-        string='API Key Header Name',
-        default='x-api-key',
-        config_parameter='hr_attendance_fingerprint.api_key_header',
-        help="The header name for the API Key (e.g., x-api-key, Authorization, etc.)"
-    )
     fingerprint_type_check_in = fields.Integer(
         string='Check-In Type Value',
         default=0,
         config_parameter='hr_attendance_fingerprint.type_check_in',
-        help="The 'type' value from API that represents a Check-In"
+        help="The 'type' value that represents a Check-In in pushed logs"
     )
     fingerprint_type_check_out = fields.Integer(
         string='Check-Out Type Value',
         default=1,
         config_parameter='hr_attendance_fingerprint.type_check_out',
-        help="The 'type' value from API that represents a Check-Out"
+        help="The 'type' value that represents a Check-Out in pushed logs"
     )
     fingerprint_api_timezone = fields.Selection(
         [
@@ -41,7 +25,19 @@ class ResConfigSettings(models.TransientModel):
         string='API Timezone',
         default='Asia/Makassar',
         config_parameter='hr_attendance_fingerprint.api_timezone',
-        help="The timezone used by the Fingerprint API. Use Asia/Makassar for WITA."
+        help="The timezone of pushed logs. Use Asia/Makassar for WITA."
+    )
+    fingerprint_chunk_size = fields.Integer(
+        string='Chunk Size',
+        default=1000,
+        config_parameter='hr_attendance_fingerprint.chunk_size',
+        help="Number of logs handed to the processor (and committed) at a time during a sync"
+    )
+    fingerprint_sync_workers = fields.Integer(
+        string='Parallel Device Syncs',
+        default=4,
+        config_parameter='hr_attendance_fingerprint.sync_workers',
+        help="Maximum number of devices polled at the same time"
     )
     fingerprint_sync_interval = fields.Integer(
         string='Sync Interval Value',
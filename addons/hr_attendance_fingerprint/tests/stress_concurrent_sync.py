@@ -0,0 +1,182 @@
+"""Multi-process stress test of concurrent fingerprint ingestion.
+
+Several processes ingest the same punches of the same employees at the
+same time, chunk by chunk, each in its own transactions, as the pull cron
+and the push queue do when their deliveries overlap. The run then checks
+that every in/out pair gave exactly one attendance with the expected check
+in and check out, and reports how many serialization failures were retried.
+
+It needs committed data and real concurrent transactions, which the test
+cursor of the Odoo test runner cannot provide, so it is run by hand against
+a database where the module is installed::
+
+    python3 stress_concurrent_sync.py -c /etc/odoo/odoo.conf -d mydb \\
+        --workers 6 --employees 30 --days 5 --require-retries
+
+Everything it creates is deleted at the end, unless ``--keep`` is given.
+The exit status is 0 when the result is consistent.
+"""
+import argparse
+import logging
+import multiprocessing
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import odoo
+from odoo import api, SUPERUSER_ID
+from odoo.modules.registry import Registry
+
+TZ = 'UTC'
+RETRY_LOGGER = 'odoo.addons.hr_attendance_fingerprint.models.hr_attendance'
+RETRY_MESSAGE = 'Concurrent fingerprint ingestion detected'
+
+
+class _RetryCounter(logging.Handler):
+
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.count = 0
+
+    def emit(self, record):
+        if record.getMessage().startswith(RETRY_MESSAGE):
+            self.count += 1
+
+
+def _generate_logs(run, fids, days, seed):
+    """Return the punches, in device order, and the expected attendances"""
+    rnd = random.Random(seed)
+    base = datetime(2000, 1, 3)
+    logs = []
+    expected = {}
+    for fid in fids:
+        for day in range(days):
+            check_in = base + timedelta(days=day, hours=7, minutes=rnd.randrange(120))
+            check_out = check_in + timedelta(hours=8, minutes=rnd.randrange(120))
+            expected.setdefault(fid, []).append((check_in, check_out))
+            for kind, when in ((0, check_in), (1, check_out)):
+                logs.append({
+                    'id': '%s-%s-%s-%s' % (run, fid, day, kind),
+                    'user_id': fid,
+                    'timestamp': when.strftime('%Y-%m-%d %H:%M:%S'),
+                    'type': kind,
+                    'device_sn': 'STRESS-%s' % run,
+                })
+    logs.sort(key=lambda log: log['timestamp'])
+    return logs, expected
+
+
+def _worker(dbname, logs, chunk_size, attempts, seed, results):
+    counter = _RetryCounter()
+    retry_logger = logging.getLogger(RETRY_LOGGER)
+    retry_logger.setLevel(logging.INFO)
+    retry_logger.addHandler(counter)
+    rnd = random.Random(seed)
+    error = None
+    try:
+        registry = Registry(dbname)
+        for start in range(0, len(logs), chunk_size):
+            # Shift the workers against each other so their chunks overlap differently
+            time.sleep(rnd.random() * 0.05)
+            with registry.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                chunk = [dict(log) for log in logs[start:start + chunk_size]]
+                env['hr.attendance']._process_attendance_logs_retrying(chunk, 0, 1, TZ, attempts=attempts)
+    except Exception as e:
+        error = repr(e)
+    results.put((seed, counter.count, error))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-c', '--config', help="Odoo configuration file")
+    parser.add_argument('-d', '--database', required=True)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--employees', type=int, default=20)
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--chunk-size', type=int, default=25)
+    parser.add_argument('--attempts', type=int, default=10,
+                        help="Transaction attempts per chunk before a worker gives up")
+    parser.add_argument('--require-retries', action='store_true',
+                        help="Fail when no serialization failure was retried, i.e. the run did not overlap")
+    parser.add_argument('--keep', action='store_true', help="Keep the generated employees and attendances")
+    args = parser.parse_args(argv)
+
+    odoo_args = ['-d', args.database]
+    if args.config:
+        odoo_args += ['-c', args.config]
+    odoo.tools.config.parse_config(odoo_args)
+    registry = Registry(args.database)
+
+    run = uuid.uuid4().hex[:8]
+    fids = ['stress%s%03d' % (run, index) for index in range(args.employees)]
+    logs, expected = _generate_logs(run, fids, args.days, seed=run)
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        employees = env['hr.employee'].create([{'name': 'Stress %s' % fid, 'fid': fid} for fid in fids])
+        employee_by_fid = {employee.fid: employee.id for employee in employees}
+
+    # Children open their own connections
+    odoo.sql_db.close_all()
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(args.database, logs, args.chunk_size, args.attempts, seed, results))
+        for seed in range(args.workers)
+    ]
+    started = time.monotonic()
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for process in processes]
+    for process in processes:
+        process.join()
+    duration = time.monotonic() - started
+
+    problems = []
+    retries = 0
+    for seed, retried, error in sorted(outcomes):
+        retries += retried
+        if error:
+            problems.append("worker %s failed: %s" % (seed, error))
+
+    with registry.cursor() as cr:
+        cr.execute("""
+            SELECT employee_id, check_in, check_out
+              FROM hr_attendance
+             WHERE employee_id = ANY(%s)
+             ORDER BY employee_id, check_in
+        """, (list(employee_by_fid.values()),))
+        actual = {}
+        for employee_id, check_in, check_out in cr.fetchall():
+            actual.setdefault(employee_id, []).append((check_in, check_out))
+        for fid, pairs in expected.items():
+            found = actual.get(employee_by_fid[fid], [])
+            if found != pairs:
+                problems.append("employee %s: expected %s, got %s" % (fid, pairs, found))
+
+        cr.execute("SELECT COUNT(*) FROM fingerprint_log_key WHERE device_sn = %s", ('STRESS-%s' % run,))
+        key_count = cr.fetchone()[0]
+        if key_count != len(logs):
+            problems.append("%d log keys registered for %d punches" % (key_count, len(logs)))
+
+        if not args.keep:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            env['hr.attendance'].search([('employee_id', 'in', list(employee_by_fid.values()))]).unlink()
+            env['hr.employee'].browse(list(employee_by_fid.values())).unlink()
+
+    if args.require_retries and not retries:
+        problems.append("no serialization failure was retried, the workers did not overlap")
+
+    print("%d workers ingested %d punches of %d employees in %.1fs, %d serialization failures retried"
+          % (args.workers, len(logs), args.employees, duration, retries))
+    for problem in problems:
+        print("FAIL: %s" % problem)
+    if not problems:
+        print("OK: no duplicated or mispaired attendance")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+from datetime import datetime
+
+from odoo.tests import tagged
+from odoo.tests.common import BaseCase
+
+from odoo.addons.hr_attendance_fingerprint.tools.pairing import pair_events, CHECK_IN, CHECK_OUT
+
+
+def dt(day, hour, minute=0):
+    return datetime(2024, 1, day, hour, minute)
+
+
+@tagged('post_install', '-at_install')
+class TestPairing(BaseCase):
+
+    def test_in_out(self):
+        attendances, stats = pair_events([
+            (1, dt(1, 8), CHECK_IN, 'in'),
+            (1, dt(1, 17), CHECK_OUT, 'out'),
+        ])
+        self.assertEqual(len(attendances), 1)
+        self.assertEqual((attendances[0].check_in, attendances[0].check_out), (dt(1, 8), dt(1, 17)))
+        self.assertEqual((attendances[0].in_event, attendances[0].out_event), ('in', 'out'))
+        self.assertEqual(stats['paired'], 1)
+
+    def test_events_sorted_per_employee(self):
+        attendances, stats = pair_events([
+            (1, dt(1, 17), CHECK_OUT, 'out'),
+            (2, dt(1, 9), CHECK_IN, 'in2'),
+            (1, dt(1, 8), CHECK_IN, 'in'),
+        ])
+        by_employee = {attendance.employee_id: attendance for attendance in attendances}
+        self.assertEqual(by_employee[1].check_out, dt(1, 17))
+        self.assertFalse(by_employee[2].check_out)
+        self.assertEqual(stats['orphan_out'], 0)
+
+    def test_double_in(self):
+        attendances, stats = pair_events([
+            (1, dt(1, 8), CHECK_IN, 'in'),
+            (1, dt(1, 8, 1), CHECK_IN, 'in again'),
+            (1, dt(1, 17), CHECK_OUT, 'out'),
+        ])
+        self.assertEqual(len(attendances), 1)
+        self.assertEqual(attendances[0].in_event, 'in')
+        self.assertEqual(attendances[0].check_out, dt(1, 17))
+        self.assertEqual(stats['double_in'], 1)
+
+    def test_orphan_out(self):
+        attendances, stats = pair_events([(1, dt(1, 17), CHECK_OUT, 'out')])
+        self.assertEqual(len(attendances), 1)
+        self.assertEqual((attendances[0].check_in, attendances[0].check_out), (dt(1, 17), dt(1, 17)))
+        self.assertIsNone(attendances[0].in_event)
+        self.assertEqual(stats['orphan_out'], 1)
+
+    def test_out_before_open_check_in(self):
+        attendances, stats = pair_events(
+            [(1, dt(1, 7), CHECK_OUT, 'out')],
+            {1: [(dt(1, 8), 'record')]},
+        )
+        self.assertEqual(len(attendances), 1)
+        self.assertIsNone(attendances[0].record)
+        self.assertEqual(stats['orphan_out'], 1)
+
+    def test_overnight_shift(self):
+        attendances, stats = pair_events([
+            (1, dt(1, 22), CHECK_IN, 'in'),
+            (1, dt(2, 6), CHECK_OUT, 'out'),
+            (1, dt(2, 22), CHECK_IN, 'in 2'),
+        ])
+        self.assertEqual(len(attendances), 2)
+        self.assertEqual((attendances[0].check_in, attendances[0].check_out), (dt(1, 22), dt(2, 6)))
+        self.assertFalse(attendances[1].check_out)
+        self.assertEqual(stats['paired'], 1)
+
+    def test_close_open_attendance(self):
+        attendances, stats = pair_events(
+            [(1, dt(2, 6), CHECK_OUT, 'out'), (1, dt(2, 8), CHECK_IN, 'in')],
+            {1: [(dt(1, 22), 'record')], 2: [(dt(1, 8), 'untouched')]},
+        )
+        self.assertEqual([attendance.record for attendance in attendances], ['record', None])
+        self.assertEqual(attendances[0].check_out, dt(2, 6))
+        self.assertEqual(attendances[0].out_event, 'out')
+
+    def test_open_attendance_blocks_check_in(self):
+        attendances, stats = pair_events(
+            [(1, dt(2, 8), CHECK_IN, 'in')],
+            {1: [(dt(1, 8), 'record')]},
+        )
+        self.assertFalse(attendances)
+        self.assertEqual(stats['double_in'], 1)
+
+    def test_unmapped(self):
+        attendances, stats = pair_events([(1, dt(1, 8), None, 'break')])
+        self.assertFalse(attendances)
+        self.assertEqual(stats['unmapped'], 1)
+
+    def test_same_time_keeps_input_order(self):
+        attendances, stats = pair_events([
+            (1, dt(1, 8), CHECK_IN, 'in'),
+            (1, dt(1, 8), CHECK_OUT, 'out'),
+        ])
+        self.assertEqual(len(attendances), 1)
+        self.assertEqual(attendances[0].check_out, dt(1, 8))
@@ -0,0 +1,2 @@
+from .timestamps import parse_log_timestamps
+from .pairing import pair_events, PairedAttendance, CHECK_IN, CHECK_OUT
@@ -0,0 +1,85 @@
+from collections import defaultdict
+
+CHECK_IN = 'in'
+CHECK_OUT = 'out'
+
+
+class PairedAttendance:
+    """An attendance opened or closed by ``pair_events``.
+
+    ``record`` is the caller's handle of an attendance that was already open
+    before the batch (``None`` for new ones), ``in_event``/``out_event`` are
+    the payloads of the punches that opened and closed it.
+    """
+    __slots__ = ('employee_id', 'check_in', 'check_out', 'in_event', 'out_event', 'record')
+
+    def __init__(self, employee_id, check_in, check_out=None, in_event=None, out_event=None, record=None):
+        self.employee_id = employee_id
+        self.check_in = check_in
+        self.check_out = check_out
+        self.in_event = in_event
+        self.out_event = out_event
+        self.record = record
+
+    def __repr__(self):
+        return '<PairedAttendance %s %s -> %s>' % (self.employee_id, self.check_in, self.check_out)
+
+
+def pair_events(events, open_attendances=None):
+    """Pair check-in/check-out punches, employee by employee.
+
+    ``events`` are ``(employee_id, time, kind, payload)`` tuples, ``kind``
+    being ``CHECK_IN``, ``CHECK_OUT`` or anything else for unmapped punches.
+    ``open_attendances`` maps employee ids to the ``(check_in, record)``
+    attendances still open before the batch. Each employee's punches are
+    walked once in time order (ties keep the input order) with these rules:
+
+    * a check-in opens an attendance, unless one is already open: the
+      double-in is ignored and the earliest check-in wins;
+    * a check-out closes the oldest open attendance when it is not earlier
+      than its check-in, whatever the day: night shifts pair across
+      midnight and across batches;
+    * any other check-out is an orphan and is recorded as an attendance
+      starting and ending at the punch.
+
+    Returns ``(attendances, stats)``: the new attendances and the already
+    open ones that got closed, and the ``paired``, ``double_in``,
+    ``orphan_out`` and ``unmapped`` counters.
+    """
+    by_employee = defaultdict(list)
+    for index, (employee_id, time, kind, payload) in enumerate(events):
+        by_employee[employee_id].append((time, index, kind, payload))
+    open_attendances = open_attendances or {}
+
+    stats = {'paired': 0, 'double_in': 0, 'orphan_out': 0, 'unmapped': 0}
+    attendances = []
+    for employee_id, employee_events in by_employee.items():
+        employee_events.sort(key=lambda event: event[:2])
+        open_list = [
+            PairedAttendance(employee_id, check_in, record=record)
+            for check_in, record in sorted(open_attendances.get(employee_id, ()), key=lambda item: item[0])
+        ]
+        for time, index, kind, payload in employee_events:
+            if kind == CHECK_IN:
+                if open_list:
+                    stats['double_in'] += 1
+                    continue
+                attendance = PairedAttendance(employee_id, time, in_event=payload)
+                open_list.append(attendance)
+                attendances.append(attendance)
+
+            elif kind == CHECK_OUT:
+                if open_list and time >= open_list[0].check_in:
+                    attendance = open_list.pop(0)
+                    attendance.check_out = time
+                    attendance.out_event = payload
+                    if attendance.record is not None:
+                        attendances.append(attendance)
+                    stats['paired'] += 1
+                else:
+                    attendances.append(PairedAttendance(employee_id, time, time, out_event=payload))
+                    stats['orphan_out'] += 1
+
+            else:
+                stats['unmapped'] += 1
+    return attendances, stats
@@ -0,0 +1,44 @@
+from datetime import datetime
+from functools import lru_cache
+import pytz
+
+
+@lru_cache(maxsize=4096)
+def _utc_offset(tz_name, local_hour):
+    """UTC offset of ``tz_name`` for the naive local hour ``local_hour``"""
+    return pytz.timezone(tz_name).localize(local_hour).utcoffset()
+
+
+def _parse_naive(value):
+    # Handle ISO 8601 format and fallback
+    if 'T' in value:
+        value = value.replace('T', ' ').replace('Z', '').split('.')[0]
+    # Fast path for the canonical 'YYYY-MM-DD HH:MM:SS' shape
+    if len(value) == 19 and value[4] == '-' and value[7] == '-' and value[10] == ' ':
+        return datetime.fromisoformat(value)
+    return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+
+
+def parse_log_timestamps(values, tz_name):
+    """Parse API timestamps and convert them from ``tz_name`` to naive UTC.
+
+    The API sends LOCAL times (e.g. 14:50 WITA). UTC offsets are cached per
+    (timezone, local hour), so a chunk only pays for one pytz conversion per
+    distinct hour.
+
+    Returns ``(times, errors)``: ``times`` is aligned with ``values`` and
+    holds ``None`` for malformed entries, ``errors`` maps their index to the
+    error message.
+    """
+    times = []
+    errors = {}
+    for index, value in enumerate(values):
+        try:
+            naive_time = _parse_naive(value)
+            offset = _utc_offset(tz_name, naive_time.replace(minute=0, second=0))
+        except (TypeError, ValueError, AttributeError) as e:
+            times.append(None)
+            errors[index] = str(e)
+            continue
+        times.append(naive_time - offset)
+    return times, errors
@@ -0,0 +1 @@
+from . import fingerprint_replay_wizard
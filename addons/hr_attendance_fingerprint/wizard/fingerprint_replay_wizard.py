@@ -0,0 +1,299 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+import base64
+import csv
+import io
+import json
+import logging
+from collections import defaultdict
+
+_logger = logging.getLogger(__name__)
+
+class FingerprintReplayWizard(models.TransientModel):
+    _name = 'fingerprint.replay.wizard'
+    _description = 'Replay Fingerprint Log Dump'
+
+    state = fields.Selection([
+        ('upload', 'Upload'),
+        ('review', 'Review'),
+        ('done', 'Done'),
+    ], default='upload', required=True)
+    dump_file = fields.Binary(string='Log Dump', attachment=False,
+                              help="JSON (list, or object with 'rows'/'data') or CSV export of the reader logs")
+    dump_filename = fields.Char(string='File Name')
+    device_id = fields.Many2one('fingerprint.device', string='Device',
+                                help="Take the type mapping and timezone from this device")
+    type_check_in = fields.Integer(string='Check-In Type Value', default=lambda self: self._default_config('type_check_in', 0))
+    type_check_out = fields.Integer(string='Check-Out Type Value', default=lambda self: self._default_config('type_check_out', 1))
+    api_timezone = fields.Selection(
+        [
+            ('UTC', 'UTC'),
+            ('Asia/Jakarta', 'WIB (GMT+7)'),
+            ('Asia/Makassar', 'WITA (GMT+8)'),
+            ('Asia/Jayapura', 'WIT (GMT+9)'),
+        ],
+        string='API Timezone', required=True,
+        default=lambda self: self._default_config('api_timezone', 'Asia/Makassar'),
+    )
+    log_count = fields.Integer(string='Logs Read', readonly=True)
+    malformed_count = fields.Integer(string='Malformed Logs', readonly=True)
+    date_from = fields.Datetime(string='From', readonly=True)
+    date_to = fields.Datetime(string='To', readonly=True)
+    line_ids = fields.One2many('fingerprint.replay.wizard.line', 'wizard_id', string='Differences')
+    missing_count = fields.Integer(compute='_compute_counts')
+    duplicate_count = fields.Integer(compute='_compute_counts')
+    mispaired_count = fields.Integer(compute='_compute_counts')
+
+    @api.model
+    def _default_config(self, key, default):
+        value = self.env['ir.config_parameter'].sudo().get_param('hr_attendance_fingerprint.%s' % key)
+        if not value:
+            return default
+        return int(value) if isinstance(default, int) else value
+
+    @api.depends('line_ids.kind')
+    def _compute_counts(self):
+        for wizard in self:
+            kinds = wizard.line_ids.mapped('kind')
+            wizard.missing_count = kinds.count('missing')
+            wizard.duplicate_count = kinds.count('duplicate')
+            wizard.mispaired_count = kinds.count('mispaired')
+
+    @api.onchange('device_id')
+    def _onchange_device_id(self):
+        if self.device_id:
+            self.type_check_in = self.device_id.type_check_in
+            self.type_check_out = self.device_id.type_check_out
+            self.api_timezone = self.device_id.api_timezone
+
+    def _reopen(self):
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+            'name': _("Replay Fingerprint Logs"),
+        }
+
+    def _read_dump(self):
+        """Return the logs of the uploaded JSON or CSV dump"""
+        self.ensure_one()
+        if not self.dump_file:
+            raise UserError(_("Please upload a log dump."))
+        content = base64.b64decode(self.dump_file).decode('utf-8-sig')
+        filename = (self.dump_filename or '').lower()
+        if filename.endswith('.csv') or not content.lstrip().startswith(('[', '{')):
+            logs = []
+            for row in csv.DictReader(io.StringIO(content)):
+                log = {(key or '').strip().lower(): (value or '').strip() for key, value in row.items()}
+                if log.get('type', '').lstrip('-').isdigit():
+                    log['type'] = int(log['type'])
+                logs.append(log)
+            return logs
+        try:
+            result = json.loads(content)
+        except ValueError as e:
+            raise UserError(_("The log dump is not valid JSON: %s", e))
+        return self.env['fingerprint.device']._extract_logs(result, {})
+
+    def action_analyze(self):
+        """Pair the dump from scratch and diff the result with the attendances"""
+        self.ensure_one()
+        logs = self._read_dump()
+        Attendance = self.env['hr.attendance'].sudo()
+        entries, malformed = Attendance._prepare_fingerprint_entries(logs, self.api_timezone)
+        # Datetime fields are stored to the second, compare at that precision
+        entries = sorted((entry[:4] + (entry[4].replace(microsecond=0),) for entry in entries), key=lambda entry: entry[4])
+
+        self.line_ids.unlink()
+        vals = {
+            'state': 'review',
+            'log_count': len(logs),
+            'malformed_count': len(malformed),
+            'date_from': entries[0][4] if entries else False,
+            'date_to': entries[-1][4] if entries else False,
+        }
+        if entries:
+            self.env['fingerprint.replay.wizard.line'].create([
+                dict(line, wizard_id=self.id) for line in self._reconcile(entries)
+            ])
+        self.write(vals)
+        return self._reopen()
+
+    def _reconcile(self, entries):
+        """Return the line values describing how the attendances in the time
+        window of ``entries`` differ from what the pairing rules produce"""
+        Attendance = self.env['hr.attendance'].sudo()
+        LogKey = self.env['fingerprint.log.key']
+        employee_by_fid = self.env['hr.employee']._get_fid_employee_map(self.device_id.company_id.id)
+        employee_ids = list({employee_by_fid[entry[1]] for entry in entries if entry[1] in employee_by_fid})
+        if not employee_ids:
+            return []
+        date_from, date_to = entries[0][4], entries[-1][4]
+
+        # Attendances of the window, plus the ones still open when it starts
+        Attendance.flush_model()
+        self.env.cr.execute("""
+            SELECT id, employee_id, check_in, check_out, external_log_id, device_sn
+              FROM hr_attendance
+             WHERE employee_id = ANY(%s)
+               AND check_in <= %s
+               AND (check_in >= %s OR check_out IS NULL OR check_out >= %s)
+             ORDER BY check_in, id
+        """, (employee_ids, date_to, date_from, date_from))
+        rows = self.env.cr.dictfetchall()
+
+        open_by_employee = defaultdict(list)
+        by_ext = defaultdict(list)
+        by_check_in = defaultdict(list)
+        for row in rows:
+            if row['check_in'] < date_from:
+                open_by_employee[row['employee_id']].append(Attendance.browse(row['id']))
+            elif row['external_log_id']:
+                by_ext[row['employee_id'], LogKey._normalize_device_sn(row['device_sn']), row['external_log_id']].append(row)
+            else:
+                by_check_in[row['employee_id'], row['check_in']].append(row)
+
+        pairing = Attendance._pair_fingerprint_entries(
+            entries, employee_by_fid, open_by_employee, set(), self.type_check_in, self.type_check_out)
+        keys_by_target = defaultdict(list)
+        for device_sn, ext_id, target in pairing['claimed_keys']:
+            keys_by_target[id(target)].append([device_sn, ext_id])
+
+        lines = []
+        for vals in pairing['to_create']:
+            employee_id = vals['employee_id']
+            check_out = vals.get('check_out') or False
+            matches = by_ext.get((employee_id, LogKey._normalize_device_sn(vals.get('device_sn')), vals['external_log_id'])) \
+                or by_check_in.get((employee_id, vals['check_in'])) or []
+            line = {
+                'employee_id': employee_id,
+                'check_in': vals['check_in'],
+                'check_out': check_out,
+                'external_log_id': vals['external_log_id'],
+                'ext_in_id': vals.get('ext_in_id') or False,
+                'ext_out_id': vals.get('ext_out_id') or False,
+                'device_name': vals.get('device_name') or False,
+                'device_sn': vals.get('device_sn') or False,
+                'raw_type': vals.get('raw_type'),
+                'log_keys': json.dumps(keys_by_target[id(vals)]),
+            }
+            if not matches:
+                lines.append(dict(line, kind='missing'))
+                continue
+            keep = matches[0]
+            for duplicate in matches[1:]:
+                lines.append(dict(line, kind='duplicate', attendance_id=duplicate['id'], keep_attendance_id=keep['id'],
+                                  current_check_out=duplicate['check_out']))
+            # An open expectation may have been closed by hand, only flag contradicting punches
+            if check_out and keep['check_out'] != check_out:
+                lines.append(dict(line, kind='mispaired', attendance_id=keep['id'], current_check_out=keep['check_out']))
+            # Each existing attendance accounts for one expectation at most
+            matches.clear()
+
+        for attendance, vals in pairing['to_write'].items():
+            if attendance.check_out != vals['check_out']:
+                lines.append({
+                    'kind': 'mispaired',
+                    'employee_id': attendance.employee_id.id,
+                    'attendance_id': attendance.id,
+                    'check_in': attendance.check_in,
+                    'check_out': vals['check_out'],
+                    'current_check_out': attendance.check_out,
+                    'external_log_id': attendance.external_log_id,
+                    'ext_out_id': vals['ext_out_id'],
+                    'log_keys': json.dumps(keys_by_target[id(attendance)]),
+                })
+        return lines
+
+    def action_apply(self):
+        """Apply the reviewed differences in bulk"""
+        self.ensure_one()
+        Attendance = self.env['hr.attendance'].sudo()
+        LogKey = self.env['fingerprint.log.key'].sudo()
+        lines = self.line_ids
+        if not lines:
+            raise UserError(_("There is nothing to fix."))
+        Attendance._lock_fingerprint_employees(lines.employee_id.ids)
+
+        # Sort the lines out first: dropping duplicates clears their attendance
+        duplicates = lines.filtered(lambda line: line.kind == 'duplicate' and line.attendance_id)
+        mispaired = lines.filtered(
+            lambda line: line.kind == 'mispaired' and line.attendance_id and line.attendance_id not in duplicates.attendance_id)
+        missing = lines.filtered(lambda line: line.kind == 'missing')
+        repaired = [(line, line.attendance_id) for line in mispaired]
+
+        # 1. Drop duplicates, keeping their processed log keys on the kept record
+        if duplicates:
+            LogKey.flush_model()
+            self.env.cr.execute("""
+                UPDATE fingerprint_log_key AS k
+                   SET attendance_id = d.keep_id
+                  FROM unnest(%s::int[], %s::int[]) AS d(duplicate_id, keep_id)
+                 WHERE k.attendance_id = d.duplicate_id
+            """, ([line.attendance_id.id for line in duplicates], [line.keep_attendance_id.id for line in duplicates]))
+            LogKey.invalidate_model(['attendance_id'])
+            duplicates.attendance_id.unlink()
+
+        # 2. Re-pair check-outs, one write per distinct check-out
+        attendance_ids_by_vals = defaultdict(list)
+        for line, attendance in repaired:
+            attendance_ids_by_vals[line.check_out, line.ext_out_id].append(attendance.id)
+        for (check_out, ext_out_id), attendance_ids in attendance_ids_by_vals.items():
+            Attendance.browse(attendance_ids).write({'check_out': check_out, 'ext_out_id': ext_out_id})
+
+        # 3. Create the missing attendances in one go
+        created = Attendance.create([line._prepare_attendance_vals() for line in missing])
+
+        # 4. Register the replayed logs so the next syncs skip them
+        rows = []
+        for line, attendance in list(zip(missing, created)) + repaired:
+            rows += [(device_sn, ext_id, attendance.id) for device_sn, ext_id in json.loads(line.log_keys or '[]')]
+        existing = LogKey._get_existing_keys({(device_sn, ext_id) for device_sn, ext_id, attendance_id in rows})
+        LogKey._claim_keys([row for key, row in {row[:2]: row for row in rows}.items() if key not in existing])
+
+        _logger.info("Fingerprint replay applied: %d missing created, %d duplicates removed, %d check-outs re-paired",
+                     len(missing), len(duplicates), len(mispaired))
+        self.state = 'done'
+        return self._reopen()
+
+
+class FingerprintReplayWizardLine(models.TransientModel):
+    _name = 'fingerprint.replay.wizard.line'
+    _description = 'Fingerprint Replay Difference'
+    _order = 'employee_id, check_in'
+
+    wizard_id = fields.Many2one('fingerprint.replay.wizard', required=True, ondelete='cascade')
+    kind = fields.Selection([
+        ('missing', 'Missing'),
+        ('duplicate', 'Duplicate'),
+        ('mispaired', 'Mis-paired'),
+    ], string='Difference', required=True)
+    employee_id = fields.Many2one('hr.employee', string='Employee', required=True)
+    attendance_id = fields.Many2one('hr.attendance', string='Attendance', ondelete='set null')
+    keep_attendance_id = fields.Many2one('hr.attendance', string='Kept Attendance')
+    check_in = fields.Datetime(string='Check In')
+    check_out = fields.Datetime(string='Expected Check Out')
+    current_check_out = fields.Datetime(string='Current Check Out')
+    external_log_id = fields.Char(string='External Log ID')
+    ext_in_id = fields.Char(string='Ext In ID')
+    ext_out_id = fields.Char(string='Ext Out ID')
+    device_name = fields.Char(string='Device Name')
+    device_sn = fields.Char(string='Device SN')
+    raw_type = fields.Integer(string='Raw Type')
+    log_keys = fields.Text(help="(device_sn, external_id) keys of the logs behind this line, as JSON")
+
+    def _prepare_attendance_vals(self):
+        self.ensure_one()
+        return {
+            'employee_id': self.employee_id.id,
+            'check_in': self.check_in,
+            'check_out': self.check_out,
+            'external_log_id': self.external_log_id,
+            'ext_in_id': self.ext_in_id,
+            'ext_out_id': self.ext_out_id,
+            'device_name': self.device_name,
+            'device_sn': self.device_sn,
+            'raw_type': self.raw_type,
+        }
@@ -10,6 +10,7 @@
         'security/ir.model.access.csv',
         'data/master_data.xml',
         'data/form_sequences.xml',
+        'data/ir_cron_data.xml',
         'views/asset_views.xml',
         'views/consumable_views.xml',
         'views/dashboard_views.xml',
@@ -21,10 +22,12 @@
         'views/asset_swap_views.xml',
         'views/printer_usage_views.xml',
         'views/asset_form_views.xml',
+        'wizard/printer_usage_import_views.xml',
         'report/asset_report.xml',
         'report/asset_report_templates.xml',
         'report/form_reports.xml',
         'report/form_report_templates.xml',
+        'views/report_batch_views.xml',
     ],
     'assets': {
         'web.assets_backend': [
@@ -1,5 +1,6 @@
 from . import asset_category
 from . import asset
+from . import asset_dashboard_stat
 from . import asset_assignment
 from . import asset_maintenance
 from . import consumable
@@ -8,3 +9,5 @@ from . import asset_unit
 from . import printer_usage
 from . import asset_form
 from . import asset_swap
+from . import stock_location
+from . import report_batch
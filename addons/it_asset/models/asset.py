@@ -1,7 +1,10 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import UserError, ValidationError
+from collections import Counter, defaultdict
 import logging
 
+from .asset_dashboard_stat import DASHBOARD_KEY_FIELDS
+
 _logger = logging.getLogger(__name__)
 
 class ITAsset(models.Model):
@@ -57,13 +60,19 @@ class ITAsset(models.Model):
     maintenance_ids = fields.One2many('it_asset.maintenance', 'asset_id', string='Maintenances')
     printer_usage_ids = fields.One2many('it_asset.printer.usage', 'asset_id', string='Printer Usage Records')
     is_printer = fields.Boolean(compute='_compute_is_printer', store=True)
-    damage_report_count = fields.Integer(compute='_compute_form_counts')
-    handover_count = fields.Integer(compute='_compute_form_counts')
+    damage_report_ids = fields.One2many('it_asset.damage_report', 'asset_id', string='Damage Reports')
+    handover_ids = fields.One2many('it_asset.handover', 'asset_id', string='Handovers')
+    damage_report_count = fields.Integer(compute='_compute_form_counts', store=True)
+    handover_count = fields.Integer(compute='_compute_form_counts', store=True)
 
+    @api.depends('damage_report_ids', 'handover_ids')
     def _compute_form_counts(self):
+        domain = [('asset_id', 'in', self.ids)]
+        damage_counts = {asset.id: count for asset, count in self.env['it_asset.damage_report']._read_group(domain, ['asset_id'], ['__count'])}
+        handover_counts = {asset.id: count for asset, count in self.env['it_asset.handover']._read_group(domain, ['asset_id'], ['__count'])}
         for record in self:
-            record.damage_report_count = self.env['it_asset.damage_report'].search_count([('asset_id', '=', record.id)])
-            record.handover_count = self.env['it_asset.handover'].search_count([('asset_id', '=', record.id)])
+            record.damage_report_count = damage_counts.get(record.id, 0)
+            record.handover_count = handover_counts.get(record.id, 0)
 
     def action_view_damage_reports(self):
         return {
@@ -114,28 +123,34 @@ class ITAsset(models.Model):
 
     @api.model_create_multi
     def create(self, vals_list):
+        # Read the products of the whole batch at once
+        products = self.env['product.product'].browse({vals['product_id'] for vals in vals_list if vals.get('product_id')})
+        storable_ids = set(products.filtered(lambda p: p.type in ['product', 'storable']).ids)
+
+        checks = []
         for vals in vals_list:
-            if vals.get('product_id'):
-                product = self.env['product.product'].browse(vals['product_id'])
-                if product.type in ['product', 'storable']:
+            if vals.get('product_id') in storable_ids:
+                if vals.get('employee_id') or vals.get('unit_id'):
+                    vals['state'] = 'in_use'
+                    vals['is_stock_synced'] = True
 
-                    if vals.get('employee_id') or vals.get('unit_id'):
-                        vals['state'] = 'in_use'
-                        vals['is_stock_synced'] = True
-                    
-                    # Pre-flight check (No manual locking)
-                    if vals.get('state', 'available') not in ('retired', 'maintenance'):
-                        self._preflight_stock_check(product, vals.get('lot_id'))
+                # Pre-flight check (No manual locking)
+                if vals.get('state', 'available') not in ('retired', 'maintenance'):
+                    checks.append((vals['product_id'], vals.get('lot_id')))
+        self._preflight_stock_checks(checks)
 
         records = super(ITAsset, self).create(vals_list)
+        records._update_dashboard_stats(1)
 
         if not self.env.context.get('skip_stock_move'):
+            # One transfer per assignee, whatever the number of assets
+            to_assign = defaultdict(list)
             for record in records:
-                if record.employee_id:
-                    record._trigger_stock_assignment(record.employee_id)
-                    record._create_handover_log(record.employee_id.id)
-                elif record.unit_id:
-                    record._trigger_stock_assignment(record.unit_id)
+                if record.employee_id or record.unit_id:
+                    to_assign[record.employee_id or record.unit_id].append(record.id)
+            for target, asset_ids in to_assign.items():
+                self.browse(asset_ids)._trigger_stock_assignment(target)
+            records.filtered('employee_id')._create_handover_logs()
         
         return records
 
@@ -158,31 +173,48 @@ class ITAsset(models.Model):
                  vals['is_stock_synced'] = False
 
         if any(k in vals for k in ['product_id', 'lot_id', 'state']):
-            for record in self:
+            # Check the distinct (product, lot) pairs against one stock snapshot
+            if 'state' in vals:
+                records = self if vals['state'] not in ['retired', 'maintenance'] else self.browse()
+            else:
+                records = self.filtered(lambda r: r.state not in ['retired', 'maintenance'])
+            products = self.env['product.product'].browse(
+                [vals['product_id']] if vals.get('product_id') else records.product_id.ids
+            )
+            storable_ids = set(products.filtered(lambda p: p.type in ['product', 'storable']).ids)
+            checks = []
+            for record in records:
                 p_id = vals.get('product_id', record.product_id.id)
-                l_id = vals.get('lot_id', record.lot_id.id)
-                st = vals.get('state', record.state)
-                product = self.env['product.product'].browse(p_id)
-                
-                if product.type in ['product', 'storable'] and st not in ['retired', 'maintenance']:
-                    self._preflight_stock_check(product, l_id)
-
-        old_data = {r.id: {'emp': r.employee_id.id, 'unit': r.unit_id.id} for r in self}
+                if p_id in storable_ids:
+                    checks.append((p_id, vals.get('lot_id', record.lot_id.id)))
+            self._preflight_stock_checks(checks)
+
+        # Previous assignees, read in one query
+        old_data = {}
+        if self.ids:
+            self.flush_recordset(['employee_id', 'unit_id'])
+            self.env.cr.execute("SELECT id, employee_id, unit_id FROM it_asset_asset WHERE id = ANY(%s)", (self.ids,))
+            old_data = {asset_id: {'emp': emp_id, 'unit': unit_id} for asset_id, emp_id, unit_id in self.env.cr.fetchall()}
+        update_stats = any(key in vals for key in DASHBOARD_KEY_FIELDS)
+        if update_stats:
+            stat_deltas = self._get_dashboard_stat_deltas(-1)
         res = super(ITAsset, self).write(vals)
+        if update_stats:
+            stat_deltas.update(self._get_dashboard_stat_deltas(1))
+            self.env['it_asset.dashboard.stat']._apply_deltas(stat_deltas)
 
         # Connect with Handover and Assignment History
         if 'employee_id' in vals:
-            for record in self:
-                new_emp_id = vals.get('employee_id')
-                old_emp_id = old_data[record.id]['emp']
-                
-                if new_emp_id and new_emp_id != old_emp_id:
-                    record._create_handover_log(new_emp_id)
-                elif not new_emp_id and old_emp_id:
-                    record._close_assignment_log(old_emp_id)
+            new_emp_id = vals.get('employee_id')
+            if new_emp_id:
+                self.filtered(lambda r: old_data[r.id]['emp'] != new_emp_id)._create_handover_logs()
+            else:
+                self._close_assignment_logs({asset_id: data['emp'] for asset_id, data in old_data.items() if data['emp']})
 
         if not self.env.context.get('skip_stock_move'):
             if 'employee_id' in vals or 'unit_id' in vals:
+                to_assign = defaultdict(list)
+                to_return = defaultdict(list)
                 for record in self:
                     new_emp_id = vals.get('employee_id', record.employee_id.id)
                     new_unit_id = vals.get('unit_id', record.unit_id.id)
@@ -192,53 +224,80 @@ class ITAsset(models.Model):
                     # Trigger assignment if newly assigned
                     if (new_emp_id and not old_emp_id) or (new_unit_id and not old_unit_id):
                         target = record.employee_id if new_emp_id else record.unit_id
-                        record._trigger_stock_assignment(target)
+                        to_assign[target].append(record.id)
                     # Trigger return if unassigned
                     elif (not new_emp_id and old_emp_id) or (not new_unit_id and old_unit_id):
                         old_target = self.env['hr.employee'].browse(old_emp_id) if old_emp_id else self.env['it_asset.unit'].browse(old_unit_id)
-                        record._trigger_stock_return(old_target)
-                        self.env.cr.execute("UPDATE it_asset_asset SET is_stock_synced = FALSE WHERE id = %s", (record.id,))
-                        record.invalidate_recordset(['is_stock_synced'])
+                        to_return[old_target].append(record.id)
+
+                # One transfer per target rather than one per asset
+                for target, asset_ids in to_assign.items():
+                    self.browse(asset_ids)._trigger_stock_assignment(target)
+                for old_target, asset_ids in to_return.items():
+                    self.browse(asset_ids)._trigger_stock_return(old_target)
+                returned = self.browse([asset_id for asset_ids in to_return.values() for asset_id in asset_ids])
+                if returned:
+                    self.env.cr.execute("UPDATE it_asset_asset SET is_stock_synced = FALSE WHERE id = ANY(%s)", (returned.ids,))
+                    returned.invalidate_recordset(['is_stock_synced'])
         return res
 
-    def _create_handover_log(self, emp_id):
-        self.ensure_one()
-        employee = self.env['hr.employee'].browse(emp_id)
-        if not employee:
+    def unlink(self):
+        self._update_dashboard_stats(-1)
+        return super(ITAsset, self).unlink()
+
+    def _get_dashboard_stat_deltas(self, sign):
+        Stat = self.env['it_asset.dashboard.stat']
+        deltas = Counter()
+        for record in self:
+            deltas[Stat._get_asset_key(record)] += sign
+        return deltas
+
+    def _update_dashboard_stats(self, sign):
+        """Add (sign=1) or remove (sign=-1) these assets from the dashboard counters"""
+        self.env['it_asset.dashboard.stat']._apply_deltas(self._get_dashboard_stat_deltas(sign))
+
+    def _create_handover_logs(self):
+        """Open the handover and assignment history of these assets for their employee"""
+        assets = self.filtered('employee_id')
+        if not assets:
             return
+        today = fields.Date.today()
 
         # 1. Create Handover (BAST)
         # Search for current user's employee record
         sender = self.env.user.employee_id or self.env['hr.employee'].search([('user_id', '=', self.env.uid)], limit=1)
         if sender:
             try:
-                self.env['it_asset.handover'].create({
-                    'asset_id': self.id,
+                self.env['it_asset.handover'].create([{
+                    'asset_id': asset.id,
                     'sender_id': sender.id,
-                    'receiver_id': employee.id,
-                    'handover_date': fields.Date.today(),
+                    'receiver_id': asset.employee_id.id,
+                    'handover_date': today,
                     'state': 'draft',
-                })
+                } for asset in assets])
             except Exception as e:
-                _logger.warning("Failed to create handover record: %s", str(e))
+                _logger.warning("Failed to create handover records: %s", str(e))
         else:
             _logger.info("Skipping handover creation: current user has no employee record.")
 
         # 2. Create Assignment History
-        self.env['it_asset.assignment'].create({
-            'asset_id': self.id,
-            'employee_id': employee.id,
-            'assignment_date': fields.Date.today(),
+        self.env['it_asset.assignment'].create([{
+            'asset_id': asset.id,
+            'employee_id': asset.employee_id.id,
+            'assignment_date': today,
             'state': 'active',
-        })
+        } for asset in assets])
 
-    def _close_assignment_log(self, old_emp_id):
-        self.ensure_one()
+    @api.model
+    def _close_assignment_logs(self, old_employees):
+        """Close the active assignments of ``{asset_id: old employee id}``"""
+        if not old_employees:
+            return
         assignments = self.env['it_asset.assignment'].search([
-            ('asset_id', '=', self.id),
-            ('employee_id', '=', old_emp_id),
+            ('asset_id', 'in', list(old_employees)),
+            ('employee_id', 'in', list(set(old_employees.values()))),
             ('state', '=', 'active')
-        ])
+        ]).filtered(lambda a: old_employees[a.asset_id.id] == a.employee_id.id)
         if assignments:
             assignments.write({
                 'return_date': fields.Date.today(),
@@ -247,30 +306,49 @@ class ITAsset(models.Model):
 
     # --- INTERNAL ENGINE ---
 
-    def _preflight_stock_check(self, product, lot_id=None):
-        """Friendly Pre-flight check before tech-op"""
+    @api.model
+    def _preflight_stock_checks(self, checks):
+        """Pre-flight check of ``(product_id, lot_id)`` pairs against one
+        snapshot of the IT stock, ``lot_id`` being optional"""
+        checks = {(product_id, lot_id.id if hasattr(lot_id, 'id') else lot_id or False) for product_id, lot_id in checks}
+        if not checks:
+            return
         it_loc = self._get_it_location('it_source')
-        domain = [('product_id', '=', product.id), ('location_id', 'child_of', it_loc.id)]
-        if lot_id:
-            domain.append(('lot_id', '=', lot_id.id if hasattr(lot_id, 'id') else lot_id))
-            
-        quants = self.env['stock.quant'].sudo().search(domain)
-        if not quants:
-            raise ValidationError(_("STOCK ERROR: Product/SN not found in IT Stock."))
-        
-        # Check Free Qty (Quantity - Reserved)
-        free_qty = sum(quants.mapped(lambda q: q.quantity - q.reserved_quantity))
-        if free_qty <= 0:
-            raise ValidationError(_("STOCK UNAVAILABLE: Product exists but is already RESERVED for another operation."))
+
+        # (product, lot) -> [quant count, free qty], (product, False) summing all lots
+        snapshot = defaultdict(lambda: [0, 0.0])
+        for product, lot, count, quantity, reserved in self.env['stock.quant'].sudo()._read_group(
+            [('product_id', 'in', list({product_id for product_id, lot_id in checks})), ('location_id', 'child_of', it_loc.id)],
+            ['product_id', 'lot_id'], ['__count', 'quantity:sum', 'reserved_quantity:sum'],
+        ):
+            for key in {(product.id, lot.id), (product.id, False)}:
+                snapshot[key][0] += count
+                snapshot[key][1] += quantity - reserved
+
+        for key in checks:
+            count, free_qty = snapshot.get(key, (0, 0.0))
+            if not count:
+                raise ValidationError(_("STOCK ERROR: Product/SN not found in IT Stock."))
+            # Check Free Qty (Quantity - Reserved)
+            if free_qty <= 0:
+                raise ValidationError(_("STOCK UNAVAILABLE: Product exists but is already RESERVED for another operation."))
+
+    @api.model
+    @tools.ormcache('type')
+    def _get_it_location_id(self, type):
+        """Id of the configured IT location, False when it has to be set up.
+        Cleared by ir.config_parameter and stock.location changes"""
+        loc_id = self.env['ir.config_parameter'].sudo().get_param(f"it_asset.{type}_location_id")
+        if loc_id and self.env['stock.location'].sudo().browse(int(loc_id)).exists():
+            return int(loc_id)
+        return False
 
     def _get_it_location(self, type):
-        param_key = f"it_asset.{type}_location_id"
-        loc_id = self.env['ir.config_parameter'].sudo().get_param(param_key)
-        
+        loc_id = self._get_it_location_id(type)
         if loc_id:
-            loc = self.env['stock.location'].browse(int(loc_id))
-            if loc.exists(): return loc
+            return self.env['stock.location'].browse(loc_id)
 
+        param_key = f"it_asset.{type}_location_id"
         wh = self.env['stock.warehouse'].search([('company_id', '=', self.env.company.id)], limit=1)
         if not wh: wh = self.env['stock.warehouse'].search([], limit=1)
         if not wh: raise UserError(_("Setup Warehouse first."))
@@ -288,50 +366,84 @@ class ITAsset(models.Model):
                 loc = self.env['stock.location'].create({
                     'name': 'User', 'location_id': parent.id, 'usage': 'internal', 'company_id': self.env.company.id
                 })
-        
-        self.env['ir.config_parameter'].sudo().set_param(param_key, loc.id)
+
+        # Only write when the stored value is stale, set_param also clears the cache
+        if self.env['ir.config_parameter'].sudo().get_param(param_key) != str(loc.id):
+            self.env['ir.config_parameter'].sudo().set_param(param_key, loc.id)
         return loc
 
-    def _create_it_stock_move(self, src, dest, reference):
-        """Standard Odoo 18 Internal Transfer Logic with proper error handling"""
+    def _create_it_stock_moves(self, src, dest, reference):
+        """Move these assets from ``src`` to ``dest`` with a single internal transfer:
+        one move per product, one move line per lot, validated once"""
+        if not self:
+            return
         ptype = self.env['stock.picking.type'].search([('code', '=', 'internal'), ('company_id', '=', self.env.company.id)], limit=1)
         if not ptype: raise UserError(_("Internal Picking Type missing."))
-        
+
         picking = self.env['stock.picking'].sudo().create({
             'picking_type_id': ptype.id,
             'location_id': src.id,
             'location_dest_id': dest.id,
-            'origin': self.name,
+            'origin': self.name if len(self) == 1 else reference,
+            'move_type': 'one',
             'company_id': self.env.company.id,
         })
-        
-        move = self.env['stock.move'].sudo().create({
-            'name': reference, 'product_id': self.product_id.id,
-            'product_uom_qty': 1.0, 'product_uom': self.product_id.uom_id.id,
+
+        assets_by_product = defaultdict(lambda: self.browse())
+        for asset in self:
+            assets_by_product[asset.product_id] += asset
+        self.env['stock.move'].sudo().create([{
+            'name': reference, 'product_id': product.id,
+            'product_uom_qty': len(assets), 'product_uom': product.uom_id.id,
             'picking_id': picking.id, 'location_id': src.id, 'location_dest_id': dest.id,
-        })
-        
+        } for product, assets in assets_by_product.items()])
+
         picking.action_confirm()
         picking.action_assign()
-        
+
         # HERE IS THE REAL ATOMICITY (Relying on Odoo internal engine)
-        if picking.state == 'assigned':
-            for line in picking.move_line_ids:
-                if self.lot_id: line.lot_id = self.lot_id.id
-                line.quantity = 1.0
-                line.picked = True
+        # Every move must be fully reserved, a partial transfer would leave assets marked in use
+        if all(move.state == 'assigned' for move in picking.move_ids):
+            lots = self.lot_id
+            # Where each lot actually sits, the source may have sublocations
+            lot_locations = {}
+            if lots:
+                for quant in self.env['stock.quant'].sudo().search([
+                    ('lot_id', 'in', lots.ids), ('location_id', 'child_of', src.id), ('quantity', '>', 0),
+                ]):
+                    lot_locations.setdefault(quant.lot_id, quant.location_id)
+
+            line_vals = []
+            for move in picking.move_ids:
+                assets = assets_by_product[move.product_id]
+                if not assets.lot_id:
+                    move.move_line_ids.picked = True
+                    continue
+                # Swap the reservation for the lots of the assets
+                move.move_line_ids.unlink()
+                for lot, quantity in Counter(asset.lot_id for asset in assets).items():
+                    line_vals.append({
+                        'move_id': move.id, 'picking_id': picking.id,
+                        'product_id': move.product_id.id, 'product_uom_id': move.product_uom.id,
+                        'location_id': lot_locations.get(lot, src).id, 'location_dest_id': dest.id,
+                        'lot_id': lot.id, 'quantity': quantity, 'picked': True,
+                    })
+            self.env['stock.move.line'].sudo().create(line_vals)
             picking.button_validate()
+            # A backorder or immediate transfer wizard means the transfer was not done
+            if picking.state != 'done':
+                raise UserError(_("STOCK TRANSFER FAILED: The transfer from %s could not be validated for all items.") % src.display_name)
         else:
             # Clean exit for failures
             picking.action_cancel()
             picking.unlink()
-            raise UserError(_("STOCK RESERVATION FAILED: The item at %s could not be reserved. Perhaps it was just taken by another user.") % src.display_name)
+            raise UserError(_("STOCK RESERVATION FAILED: The items at %s could not be reserved. Perhaps they were just taken by another user.") % src.display_name)
 
     def _trigger_stock_assignment(self, target):
-        self._create_it_stock_move(self._get_it_location('it_source'), self._get_it_location('it_user'), _("Assigned: %s") % target.name)
+        self._create_it_stock_moves(self._get_it_location('it_source'), self._get_it_location('it_user'), _("Assigned: %s") % target.name)
 
     def _trigger_stock_return(self, target):
-        self._create_it_stock_move(self._get_it_location('it_user'), self._get_it_location('it_source'), _("Return: %s") % target.name)
+        self._create_it_stock_moves(self._get_it_location('it_user'), self._get_it_location('it_source'), _("Return: %s") % target.name)
 
     # --- DASHBOARD (Optimized _read_group) ---
 
@@ -342,52 +454,18 @@ class ITAsset(models.Model):
         if not printer_period: printer_period = '7D'
         if date_start == 'null' or not date_start: date_start = None
         if date_end == 'null' or not date_end: date_end = None
-        
-        domain = []
-        if category_ids:
-            domain.append(('category_id', 'in', category_ids))
-        if date_start: domain.append(('create_date', '>=', date_start))
-        if date_end: domain.append(('create_date', '<=', date_end))
-
-        # Stats domain for Operation (Radios) restricted to Radio Rig
-        op_domain = domain + [('asset_type', '=', 'operation'), ('category_id.name', '=', 'Radio Rig')]
-        if radio_mode and radio_mode != 'all':
-            op_domain.append(('radio_mode', '=', radio_mode))
 
-        # Basic Stats
-        stats = {
-            'total_assets': self.search_count(domain),
-            'total_it': self.search_count(domain + [('asset_type', '=', 'it')]),
-            'total_operation': self.search_count(op_domain),
-            'available': self.search_count(domain + [('asset_type', '=', 'it'), ('state', '=', 'available')]),
-            'assigned': self.search_count(domain + [('asset_type', '=', 'it'), ('state', '=', 'in_use')]),
-            'unavailable_broken': self.search_count(domain + [('asset_type', '=', 'it'), ('state', '=', 'maintenance')]),
-            'retired': self.search_count(domain + [('asset_type', '=', 'it'), ('state', '=', 'retired')]),
-            'op_available': 0, 'op_assigned': 0, 'op_unavailable_broken': 0, 'op_maintenance': 0,
-            'tickets_open': 0, 'account_requests_pending': 0 # Placeholders
-        }
-
-        # 1. Operational Stats Grouping
-        op_groups = self._read_group(op_domain, ['state', 'condition'], ['__count'])
-        for state, condition, count in op_groups:
-            if state == 'available':
-                stats['op_available'] += count
-            elif state == 'in_use':
-                stats['op_assigned'] += count
-            elif state == 'maintenance' or state == 'retired':
-                stats['op_maintenance'] += count
-
-        # 2. Category Distribution
-        cat_groups = self._read_group(domain + [('asset_type', '=', 'it')], ['category_id'], ['__count'])
-        category_data = []
-        
-        for cat, count in cat_groups:
-            if cat: 
-                category_data.append({
-                    'name': cat.display_name,
-                    'count': count,
-                    'perc': (count / (stats['total_it'] or 1)) * 100
-                })
+        if not date_start and not date_end:
+            # Unfiltered loads are answered from the materialized counters
+            rows = self.env['it_asset.dashboard.stat']._get_rows()
+            stats = self._fold_dashboard_stats(rows, category_ids, radio_mode, comp_asset_cat_ids)
+            fleet_asset_count = stats.pop('fleet_asset_count')
+        else:
+            rows = self._get_live_dashboard_rows(date_start, date_end)
+            stats = self._fold_dashboard_stats(rows, category_ids, radio_mode, comp_asset_cat_ids)
+            # The fleet comparison is not restricted to the date window
+            stats.pop('fleet_asset_count')
+            fleet_asset_count = None
 
         m_domain = [('asset_id.asset_type', '=', 'it')]
         if category_ids: m_domain.append(('asset_id.category_id', 'in', category_ids))
@@ -395,27 +473,88 @@ class ITAsset(models.Model):
         
         stats.update({
             'maintenance_count': self.env['it_asset.maintenance'].search_count(m_domain),
-            'laptop_condition_distribution': self._get_laptop_condition_stats(date_start, date_end, category_ids),
-            'category_distribution': sorted(category_data, key=lambda x: x['count'], reverse=True),
-            'fleet_comparison': self._get_fleet_comparison_stats(comp_asset_cat_ids, fleet_category_ids),
+            'fleet_comparison': self._get_fleet_comparison_stats(comp_asset_cat_ids, fleet_category_ids, fleet_asset_count),
             'printer_stats': self._get_printer_dashboard_stats(printer_period)
         })
         return stats
 
-    def _get_laptop_condition_stats(self, date_start, date_end, category_ids=None):
-        laptop_cat = self.env['it_asset.category'].search([('name', 'ilike', 'laptop')], limit=1)
-        if not laptop_cat: return {'total': 0, 'data': []}
-        
-        if category_ids and laptop_cat.id not in category_ids:
-            return {'total': 0, 'data': []}
-            
-        domain = [('category_id', '=', laptop_cat.id)]
+    @api.model
+    def _fold_dashboard_stats(self, rows, category_ids=None, radio_mode='digital', comp_asset_cat_ids=None):
+        """Compute the asset counters of the dashboard from
+        ``(category_id, asset_type, state, condition, radio_mode, count)`` rows"""
+        Category = self.env['it_asset.category']
+        category_ids = set(category_ids or [])
+        comp_asset_cat_ids = set(comp_asset_cat_ids or [])
+        categories = Category.browse({row[0] for row in rows if row[0]})
+        radio_rig_ids = set(categories.filtered(lambda c: c.name == 'Radio Rig').ids)
+        laptop_cat = Category.search([('name', 'ilike', 'laptop')], limit=1)
+
+        it_state_keys = {'available': 'available', 'in_use': 'assigned', 'maintenance': 'unavailable_broken', 'retired': 'retired'}
+        op_state_keys = {'available': 'op_available', 'in_use': 'op_assigned', 'maintenance': 'op_maintenance', 'retired': 'op_maintenance'}
+        stats = {
+            'total_assets': 0, 'total_it': 0, 'total_operation': 0,
+            'available': 0, 'assigned': 0, 'unavailable_broken': 0, 'retired': 0,
+            'op_available': 0, 'op_assigned': 0, 'op_unavailable_broken': 0, 'op_maintenance': 0,
+            'tickets_open': 0, 'account_requests_pending': 0 # Placeholders
+        }
+        it_by_category = Counter()
+        laptop_by_condition = Counter()
+        fleet_asset_count = 0
+
+        for category_id, asset_type, state, condition, mode, count in rows:
+            is_radio_rig = asset_type == 'operation' and category_id in radio_rig_ids
+            # Fleet comparison ignores the dashboard filters
+            if is_radio_rig and mode == 'digital' and (not comp_asset_cat_ids or category_id in comp_asset_cat_ids):
+                fleet_asset_count += count
+            if laptop_cat and category_id == laptop_cat.id:
+                laptop_by_condition[condition] += count
+
+            if category_ids and category_id not in category_ids:
+                continue
+            stats['total_assets'] += count
+            if asset_type == 'it':
+                stats['total_it'] += count
+                if state in it_state_keys:
+                    stats[it_state_keys[state]] += count
+                if category_id:
+                    it_by_category[category_id] += count
+            elif is_radio_rig and (not radio_mode or radio_mode == 'all' or mode == radio_mode):
+                stats['total_operation'] += count
+                if state in op_state_keys:
+                    stats[op_state_keys[state]] += count
+
+        category_data = [{
+            'name': category.display_name,
+            'count': it_by_category[category.id],
+            'perc': (it_by_category[category.id] / (stats['total_it'] or 1)) * 100
+        } for category in Category.browse(sorted(it_by_category))]
+
+        if not laptop_cat or (category_ids and laptop_cat.id not in category_ids):
+            laptop_stats = {'total': 0, 'data': []}
+        else:
+            laptop_stats = self._format_laptop_condition_stats(laptop_by_condition)
+
+        stats.update({
+            'category_distribution': sorted(category_data, key=lambda x: x['count'], reverse=True),
+            'laptop_condition_distribution': laptop_stats,
+            'fleet_asset_count': fleet_asset_count,
+        })
+        return stats
+
+    @api.model
+    def _get_live_dashboard_rows(self, date_start=None, date_end=None):
+        """Same rows as ``it_asset.dashboard.stat``, restricted to the assets
+        created in the given window, from a single grouped query"""
+        domain = []
         if date_start: domain.append(('create_date', '>=', date_start))
-        
-        # Read groups and map to fixed structure
-        groups = self._read_group(domain, ['condition'], ['__count'])
-        data_map = {cond: count for cond, count in groups}
-        
+        if date_end: domain.append(('create_date', '<=', date_end))
+        groups = self._read_group(domain, list(DASHBOARD_KEY_FIELDS), ['__count'])
+        return [
+            (category.id or None, asset_type or None, state or None, condition or None, radio_mode or None, count)
+            for category, asset_type, state, condition, radio_mode, count in groups
+        ]
+
+    def _format_laptop_condition_stats(self, data_map):
         res = []
         actual_total = sum(data_map.values())
         total_for_perc = actual_total or 1
@@ -439,17 +578,18 @@ class ITAsset(models.Model):
             'data': res
         }
 
-    def _get_fleet_comparison_stats(self, asset_cat_ids=None, fleet_cat_ids=None):
+    def _get_fleet_comparison_stats(self, asset_cat_ids=None, fleet_cat_ids=None, asset_count=None):
         """Compare Operational Assets vs Fleet Units with specific filtering"""
-        # 1. Get Operational Assets
-        asset_domain = [
-            ('asset_type', '=', 'operation'), 
-            ('radio_mode', '=', 'digital'),
-            ('category_id.name', '=', 'Radio Rig')
-        ]
-        if asset_cat_ids:
-            asset_domain.append(('category_id', 'in', asset_cat_ids))
-        asset_count = self.search_count(asset_domain)
+        # 1. Get Operational Assets, unless already counted by the caller
+        if asset_count is None:
+            asset_domain = [
+                ('asset_type', '=', 'operation'), 
+                ('radio_mode', '=', 'digital'),
+                ('category_id.name', '=', 'Radio Rig')
+            ]
+            if asset_cat_ids:
+                asset_domain.append(('category_id', 'in', asset_cat_ids))
+            asset_count = self.search_count(asset_domain)
 
         # 2. Get Fleet Units
         unit_domain = []
@@ -466,19 +606,14 @@ class ITAsset(models.Model):
         }
 
     def _get_printer_dashboard_stats(self, period='7D'):
-        """Fetch printer usage summary for the dashboard"""
+        """Fetch printer usage summary for the dashboard, with per-printer,
+        per-department and per-day breakdowns"""
         Usage = self.env['it_asset.printer.usage']
         
         # Determine Date Range
         if period == 'ALL':
             # For ALL, we show the LATEST absolute readings for each printer
-            latest_usage_ids = Usage._read_group([], ['asset_id'], ['id:max'])
-            ids = [row[1] for row in latest_usage_ids if row[1]]
-            latest_records = Usage.browse(ids)
-            
-            total_bw = sum(latest_records.mapped('bw_pages'))
-            total_color = sum(latest_records.mapped('color_pages'))
-            total_printed = total_bw + total_color
+            rows = Usage._get_usage_breakdown()
         else:
             # For specific periods, we calculate GROWTH (Last - Base)
             days = 7
@@ -488,48 +623,34 @@ class ITAsset(models.Model):
             
             end_date = fields.Date.today()
             start_date = fields.Date.subtract(end_date, days=days)
-            
-            # 1. Get all printers that have usage
-            printer_ids = Usage._read_group([], ['asset_id'])
-            
-            total_bw = 0
-            total_color = 0
-            total_printed = 0
-            
-            for [printer] in printer_ids:
-                if not printer: continue
-                
-                # Latest record in period
-                last_in = Usage.search([
-                    ('asset_id', '=', printer.id),
-                    ('date', '<=', end_date),
-                    ('date', '>=', start_date)
-                ], order='date desc, id desc', limit=1)
-                
-                if not last_in: continue
-                
-                # Base record (the one just before or at start of period)
-                base = Usage.search([
-                    ('asset_id', '=', printer.id),
-                    ('date', '<', start_date)
-                ], order='date desc, id desc', limit=1)
-                
-                if not base:
-                    # If no record before period, usage is growth from first record in period
-                    first_in = Usage.search([
-                        ('asset_id', '=', printer.id),
-                        ('date', '>=', start_date)
-                    ], order='date asc, id asc', limit=1)
-                    base = first_in
-                
-                if last_in and base:
-                    total_bw += (last_in.bw_pages - base.bw_pages)
-                    total_color += (last_in.color_pages - base.color_pages)
-                    total_printed += (last_in.total_pages - base.total_pages)
-
-        return {
-            'total_color': total_color,
-            'total_bw': total_bw,
-            'total_pages': total_printed,
-            'period': period
+            rows = Usage._get_usage_breakdown(start_date, end_date)
+
+        res = {
+            'total_color': 0,
+            'total_bw': 0,
+            'total_pages': 0,
+            'period': period,
+            'by_printer': [],
+            'by_department': [],
+            'by_day': [],
         }
+        printers = self.browse([row[0] for row in rows if row[3] == 'printer'])
+        departments = self.env['hr.department'].browse([row[1] for row in rows if row[3] == 'department' and row[1]])
+        printer_names = {printer.id: printer.display_name for printer in printers}
+        department_names = {department.id: department.display_name for department in departments}
+        for asset_id, department_id, date, level, bw, color, total in rows:
+            values = {'bw': bw or 0, 'color': color or 0, 'total': total or 0}
+            if level == 'all':
+                res.update({'total_color': values['color'], 'total_bw': values['bw'], 'total_pages': values['total']})
+            elif level == 'printer':
+                res['by_printer'].append(dict(values, id=asset_id, name=printer_names[asset_id]))
+            elif level == 'department':
+                name = department_names[department_id] if department_id else _("No Department")
+                res['by_department'].append(dict(values, id=department_id or False, name=name))
+            else:
+                res['by_day'].append(dict(values, date=fields.Date.to_string(date)))
+
+        res['by_printer'].sort(key=lambda x: x['total'], reverse=True)
+        res['by_department'].sort(key=lambda x: x['total'], reverse=True)
+        res['by_day'].sort(key=lambda x: x['date'])
+        return res
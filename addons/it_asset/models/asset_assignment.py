@@ -29,10 +29,9 @@ class ITAssetAssignment(models.Model):
 
     @api.model_create_multi
     def create(self, vals_list):
-        for vals in vals_list:
-            asset = self.env['it_asset.asset'].browse(vals.get('asset_id'))
-            if asset.is_consumable:
-                raise models.ValidationError("Consumable items cannot be assigned to employees.")
+        assets = self.env['it_asset.asset'].browse([vals['asset_id'] for vals in vals_list if vals.get('asset_id')])
+        if any(asset.is_consumable for asset in assets):
+            raise models.ValidationError("Consumable items cannot be assigned to employees.")
         return super().create(vals_list)
 
     def action_return(self):
@@ -13,6 +13,12 @@ class ITAssetCategory(models.Model):
         ('name_unique', 'unique(name)', 'Category name must be unique!')
     ]
 
+    def unlink(self):
+        res = super().unlink()
+        # Assets lose their category, recount them under no category
+        self.env['it_asset.dashboard.stat']._refresh()
+        return res
+
     @api.model
     def init_master_data(self, categories):
         """Helper to load data only if it doesn't exist by name"""
@@ -0,0 +1,89 @@
+from odoo import models, fields, api
+from odoo.tools.sql import index_exists
+
+# Asset fields the dashboard counters are grouped by
+DASHBOARD_KEY_FIELDS = ('category_id', 'asset_type', 'state', 'condition', 'radio_mode')
+
+class ITAssetDashboardStat(models.Model):
+    """Insert-only log of asset count deltas per dashboard key.
+
+    Asset writes only append rows, so concurrent writes on the same bucket
+    never update or delete a shared row and cannot raise serialization
+    failures (which Odoo would answer by retrying the whole request, or by
+    failing a cron run). Readers sum the deltas per key, and the autovacuum
+    folds the log back to one row per key.
+    """
+    _name = 'it_asset.dashboard.stat'
+    _description = 'IT Asset Dashboard Counter'
+    _log_access = False
+
+    category_id = fields.Many2one('it_asset.category', string='Category', ondelete='cascade')
+    asset_type = fields.Char(string='Asset Type')
+    state = fields.Char(string='Status')
+    condition = fields.Char(string='Condition')
+    radio_mode = fields.Char(string='Radio Mode')
+    count = fields.Integer(string='Assets')
+
+    def init(self):
+        # Former upsert target, one key now spans several log rows
+        if index_exists(self.env.cr, 'it_asset_dashboard_stat_key_uniq'):
+            self.env.cr.execute("DROP INDEX it_asset_dashboard_stat_key_uniq")
+        self._refresh()
+
+    @api.model
+    def _get_asset_key(self, asset):
+        return (asset.category_id.id or None, asset.asset_type or None, asset.state or None,
+                asset.condition or None, asset.radio_mode or None)
+
+    @api.model
+    def _apply_deltas(self, deltas):
+        """Log ``{key: delta}`` asset counts, keys being ``_get_asset_key`` tuples"""
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        columns = list(zip(*deltas.keys()))
+        self.env.cr.execute("""
+            INSERT INTO it_asset_dashboard_stat (category_id, asset_type, state, condition, radio_mode, count)
+            SELECT * FROM unnest(%s::int[], %s::varchar[], %s::varchar[], %s::varchar[], %s::varchar[], %s::int[])
+        """, [list(column) for column in columns] + [list(deltas.values())])
+        self.invalidate_model()
+
+    @api.model
+    def _refresh(self):
+        """Rebuild the counters from the assets"""
+        self.env['it_asset.asset'].flush_model(DASHBOARD_KEY_FIELDS)
+        self.env.cr.execute("DELETE FROM it_asset_dashboard_stat")
+        self.env.cr.execute("""
+            INSERT INTO it_asset_dashboard_stat (category_id, asset_type, state, condition, radio_mode, count)
+            SELECT category_id, asset_type, state, condition, radio_mode, COUNT(*)
+              FROM it_asset_asset
+             GROUP BY category_id, asset_type, state, condition, radio_mode
+        """)
+        self.invalidate_model()
+
+    @api.autovacuum
+    def _gc_compact(self):
+        """Fold the logged deltas into one row per key"""
+        self.env.cr.execute("""
+            WITH folded AS (
+                DELETE FROM it_asset_dashboard_stat
+                RETURNING category_id, asset_type, state, condition, radio_mode, count
+            )
+            INSERT INTO it_asset_dashboard_stat (category_id, asset_type, state, condition, radio_mode, count)
+            SELECT category_id, asset_type, state, condition, radio_mode, SUM(count)
+              FROM folded
+             GROUP BY category_id, asset_type, state, condition, radio_mode
+            HAVING SUM(count) <> 0
+        """)
+        self.invalidate_model()
+
+    @api.model
+    def _get_rows(self):
+        """Return the ``(category_id, asset_type, state, condition, radio_mode, count)`` rows"""
+        self.env.cr.execute("""
+            SELECT category_id, asset_type, state, condition, radio_mode, SUM(count)::int
+              FROM it_asset_dashboard_stat
+             GROUP BY category_id, asset_type, state, condition, radio_mode
+            HAVING SUM(count) <> 0
+        """)
+        return self.env.cr.fetchall()
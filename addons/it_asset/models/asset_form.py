@@ -1,9 +1,59 @@
 from odoo import models, fields, api, _
 
+ROMAN_MONTHS = {1: 'I', 2: 'II', 3: 'III', 4: 'IV', 5: 'V', 6: 'VI',
+                7: 'VII', 8: 'VIII', 9: 'IX', 10: 'X', 11: 'XI', 12: 'XII'}
+
+class ITAssetSequenceMixin(models.AbstractModel):
+    _name = 'it_asset.sequence.mixin'
+    _description = 'IT Form Reference'
+
+    # ir.sequence code of the references
+    _sequence_code = None
+    # When set, references become "<seq>/<roman month>/<suffix>/<year>" of this date field
+    _sequence_date_field = None
+    _sequence_name_suffix = None
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        pending = [vals for vals in vals_list if vals.get('name', _('New')) == _('New')]
+        if pending:
+            for vals, seq in zip(pending, self._reserve_sequence_numbers(self._sequence_code, len(pending))):
+                vals['name'] = self._format_sequence_name(seq, vals) if seq else _('New')
+        return super().create(vals_list)
+
+    @api.model
+    def _reserve_sequence_numbers(self, code, count):
+        """Return ``count`` references of the ``code`` sequence, reserved in one
+        call for standard sequences. No-gap and date range sequences keep going
+        through ``next_by_id``, which they need for their locking and ranges"""
+        sequence = self.env['ir.sequence'].sudo().search([
+            ('code', '=', code), ('company_id', 'in', [self.env.company.id, False]),
+        ], order='company_id', limit=1)
+        if not sequence:
+            return [False] * count
+        if sequence.implementation != 'standard' or sequence.use_date_range:
+            return [sequence.next_by_id() for _i in range(count)]
+        self.env.cr.execute(
+            "SELECT nextval(%s) FROM generate_series(1, %s)",
+            ('ir_sequence_%03d' % sequence.id, count),
+        )
+        return [sequence.get_next_char(number) for number in sorted(row[0] for row in self.env.cr.fetchall())]
+
+    @api.model
+    def _format_sequence_name(self, seq, vals):
+        # Prevent double formatting if XML didn't update (Basic check: count slashes)
+        if not self._sequence_name_suffix or seq.count('/') >= 2:
+            return seq
+        date = vals.get(self._sequence_date_field)
+        date = fields.Date.to_date(date) if date else fields.Date.today()
+        return f"{seq}/{ROMAN_MONTHS[date.month]}/{self._sequence_name_suffix}/{date.year}"
+
+
 class ITAssetRequest(models.Model):
     _name = 'it_asset.request'
     _description = 'Asset Request Form'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['it_asset.sequence.mixin', 'mail.thread', 'mail.activity.mixin']
+    _sequence_code = 'it_asset.request'
     _order = 'create_date desc'
 
     name = fields.Char(string='Reference', required=True, copy=False, readonly=True, default=lambda self: _('New'))
@@ -20,13 +70,6 @@ class ITAssetRequest(models.Model):
         ('rejected', 'Rejected')
     ], string='Status', default='draft', tracking=True)
 
-    @api.model_create_multi
-    def create(self, vals_list):
-        for vals in vals_list:
-            if vals.get('name', _('New')) == _('New'):
-                vals['name'] = self.env['ir.sequence'].next_by_code('it_asset.request') or _('New')
-        return super().create(vals_list)
-
     def action_submit(self):
         self.write({'state': 'submitted'})
 
@@ -43,7 +86,10 @@ class ITAssetRequest(models.Model):
 class ITAssetHandover(models.Model):
     _name = 'it_asset.handover'
     _description = 'Asset Handover Form'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['it_asset.sequence.mixin', 'mail.thread', 'mail.activity.mixin']
+    _sequence_code = 'it_asset.handover'
+    _sequence_date_field = 'handover_date'
+    _sequence_name_suffix = 'BAST/GSI-IT'
     _order = 'handover_date desc'
 
     name = fields.Char(string='Reference', required=True, copy=False, readonly=True, default=lambda self: _('New'))
@@ -58,33 +104,6 @@ class ITAssetHandover(models.Model):
         ('signed', 'Signed')
     ], string='Status', default='draft', tracking=True)
 
-    @api.model_create_multi
-    def create(self, vals_list):
-        for vals in vals_list:
-            if vals.get('name', _('New')) == _('New'):
-                seq = self.env['ir.sequence'].next_by_code('it_asset.handover') or _('New')
-                if seq != _('New'):
-                    handover_date = vals.get('handover_date')
-                    if handover_date:
-                        handover_date = fields.Date.from_string(handover_date)
-                    else:
-                        handover_date = fields.Date.today()
-                    
-                    year = handover_date.year
-                    month = handover_date.month
-                    roman_map = {1: 'I', 2: 'II', 3: 'III', 4: 'IV', 5: 'V', 6: 'VI', 
-                                 7: 'VII', 8: 'VIII', 9: 'IX', 10: 'X', 11: 'XI', 12: 'XII'}
-                    roman_month = roman_map.get(month, 'I')
-
-                    # Prevent double formatting if XML didn't update
-                    if seq.count('/') < 2:
-                        vals['name'] = f"{seq}/{roman_month}/BAST/GSI-IT/{year}"
-                    else:
-                        vals['name'] = seq
-                else:
-                    vals['name'] = seq
-        return super().create(vals_list)
-
     def action_sign(self):
         self.write({'state': 'signed'})
 
@@ -92,7 +111,10 @@ class ITAssetHandover(models.Model):
 class ITAssetDamageReport(models.Model):
     _name = 'it_asset.damage_report'
     _description = 'Asset Damage Report'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['it_asset.sequence.mixin', 'mail.thread', 'mail.activity.mixin']
+    _sequence_code = 'it_asset.damage_report'
+    _sequence_date_field = 'report_date'
+    _sequence_name_suffix = 'BA/GSI-IT'
     _order = 'report_date desc'
 
     name = fields.Char(string='Reference', required=True, copy=False, readonly=True, default=lambda self: _('New'))
@@ -113,37 +135,6 @@ class ITAssetDamageReport(models.Model):
         ('resolved', 'Resolved')
     ], string='Status', default='draft', tracking=True)
 
-    @api.model_create_multi
-    def create(self, vals_list):
-        for vals in vals_list:
-            if vals.get('name', _('New')) == _('New'):
-                seq = self.env['ir.sequence'].next_by_code('it_asset.damage_report') or _('New')
-                # Custom Roman Month Logic
-                # Check if seq is a raw number (or at least doesn't contain the full old suffix already)
-                # We assume standard upgrade flow where seq becomes '0001'
-                if seq != _('New'):
-                    # Default todays date if not provided
-                    report_date = vals.get('report_date')
-                    if report_date:
-                        report_date = fields.Date.from_string(report_date)
-                    else:
-                        report_date = fields.Date.today()
-                        
-                    year = report_date.year
-                    month = report_date.month
-                    roman_map = {1: 'I', 2: 'II', 3: 'III', 4: 'IV', 5: 'V', 6: 'VI', 
-                                 7: 'VII', 8: 'VIII', 9: 'IX', 10: 'X', 11: 'XI', 12: 'XII'}
-                    roman_month = roman_map.get(month, 'I')
-                    
-                    # Prevent double formatting if XML didn't update (Basic check: count slashes)
-                    if seq.count('/') < 2:
-                        vals['name'] = f"{seq}/{roman_month}/BA/GSI-IT/{year}"
-                    else:
-                        vals['name'] = seq
-                else:
-                    vals['name'] = seq
-        return super().create(vals_list)
-
     def action_confirm(self):
         self.write({'state': 'confirmed'})
         if self.asset_id:
@@ -156,7 +147,8 @@ class ITAssetDamageReport(models.Model):
 class ITAccountRequest(models.Model):
     _name = 'it_asset.account_request'
     _description = 'Account Request Form'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['it_asset.sequence.mixin', 'mail.thread', 'mail.activity.mixin']
+    _sequence_code = 'it_asset.account_request'
     _order = 'create_date desc'
 
     name = fields.Char(string='Reference', required=True, copy=False, readonly=True, default=lambda self: _('New'))
@@ -177,13 +169,6 @@ class ITAccountRequest(models.Model):
         ('rejected', 'Rejected')
     ], string='Status', default='draft', tracking=True)
 
-    @api.model_create_multi
-    def create(self, vals_list):
-        for vals in vals_list:
-            if vals.get('name', _('New')) == _('New'):
-                vals['name'] = self.env['ir.sequence'].next_by_code('it_asset.account_request') or _('New')
-        return super().create(vals_list)
-
     def action_submit(self):
         self.write({'state': 'submitted'})
 
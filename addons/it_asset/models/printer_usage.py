@@ -1,5 +1,9 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from odoo.tools.sql import create_index, index_exists
+
+# Sorts unsaved readings after the saved ones of the same date
+MAX_ID = 2 ** 31 - 1
 
 class ITPrinterUsage(models.Model):
     _name = 'it_asset.printer.usage'
@@ -18,35 +22,178 @@ class ITPrinterUsage(models.Model):
     color_diff = fields.Integer(string='Color Printed (Diff)', compute='_compute_pages_diff', store=True)
     remarks = fields.Char(string='Remarks')
 
+    def init(self):
+        if not index_exists(self.env.cr, 'it_asset_printer_usage_asset_date_index'):
+            create_index(self.env.cr, 'it_asset_printer_usage_asset_date_index', self._table, ['asset_id', 'date', 'id'])
+
+    @api.model
+    def _get_usage_breakdown(self, date_from=None, date_to=None):
+        """Pages printed between ``date_from`` and ``date_to`` (inclusive),
+        from a single query.
+
+        Every reading of the window is paired with the previous reading of
+        the same printer (``LAG``), the latest reading before the window
+        (``DISTINCT ON``) acting as the base; the deltas then telescope to
+        "last reading - base" per printer. Without ``date_from`` counters
+        are taken from zero, i.e. the totals are the latest absolute
+        readings. Without a base, a printer's usage starts at its first
+        reading of the window.
+
+        Returns ``(asset_id, department_id, date, level, bw, color, total)``
+        rows, ``level`` telling the grouping apart: 'all', 'printer',
+        'department' (of the assigned employee) or 'day'.
+        """
+        self.flush_model(['asset_id', 'date', 'bw_pages', 'color_pages', 'total_pages'])
+        self.env['it_asset.asset'].flush_model(['employee_id'])
+        self.env['hr.employee'].flush_model(['department_id'])
+        params = {'date_from': date_from, 'date_to': date_to}
+        if date_from:
+            base = """
+                UNION ALL
+                SELECT * FROM (
+                    SELECT DISTINCT ON (u.asset_id) u.id, u.asset_id, u.date, u.bw_pages, u.color_pages, u.total_pages, TRUE
+                      FROM it_asset_printer_usage u
+                     WHERE u.date < %(date_from)s
+                     ORDER BY u.asset_id, u.date DESC, u.id DESC
+                ) AS base
+            """
+            window = "u.date >= %(date_from)s"
+            first_delta = "0"
+        else:
+            base = ""
+            window = "TRUE"
+            first_delta = "r.{0}"
+        if date_to:
+            window += " AND u.date <= %(date_to)s"
+
+        def delta(column):
+            return "COALESCE(r.{0} - LAG(r.{0}) OVER w, {1})".format(column, first_delta.format(column))
+
+        self.env.cr.execute(f"""
+            WITH readings AS (
+                SELECT u.id, u.asset_id, u.date, u.bw_pages, u.color_pages, u.total_pages, FALSE AS is_base
+                  FROM it_asset_printer_usage u
+                 WHERE {window}
+                {base}
+            ), deltas AS (
+                SELECT r.asset_id, r.date, r.is_base,
+                       {delta('bw_pages')} AS bw,
+                       {delta('color_pages')} AS color,
+                       {delta('total_pages')} AS total
+                  FROM readings r
+                WINDOW w AS (PARTITION BY r.asset_id ORDER BY r.date, r.id)
+            )
+            SELECT d.asset_id, e.department_id, d.date,
+                   CASE GROUPING(d.asset_id, e.department_id, d.date)
+                        WHEN 7 THEN 'all' WHEN 3 THEN 'printer' WHEN 5 THEN 'department' ELSE 'day'
+                   END,
+                   SUM(d.bw), SUM(d.color), SUM(d.total)
+              FROM deltas d
+              JOIN it_asset_asset a ON a.id = d.asset_id
+         LEFT JOIN hr_employee e ON e.id = a.employee_id
+             WHERE NOT d.is_base
+          GROUP BY GROUPING SETS ((), (d.asset_id), (e.department_id), (d.date))
+        """, params)
+        return self.env.cr.fetchall()
+
     @api.depends('color_pages', 'bw_pages')
     def _compute_total_pages(self):
         for record in self:
             record.total_pages = record.color_pages + record.bw_pages
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        # A back-dated reading changes the diff of the reading following it
+        records._recompute_successors()
+        return records
+
+    def write(self, vals):
+        moved = 'asset_id' in vals or 'date' in vals
+        if moved:
+            # Successors at the old position lose their predecessor
+            self._recompute_successors()
+        res = super().write(vals)
+        if moved or 'bw_pages' in vals or 'color_pages' in vals:
+            self._recompute_successors()
+        return res
+
+    def unlink(self):
+        successors = self._get_successors()
+        res = super().unlink()
+        self._mark_pages_diff_to_compute(successors - self)
+        return res
+
+    def _get_successors(self):
+        self.flush_model(['asset_id', 'date'])
+        records = self.filtered(lambda r: r.id and r.asset_id and r.date)
+        rows = self._get_adjacent_readings([(r.id, r.asset_id.id, r.date) for r in records], previous=False)
+        return self.browse({row[0] for row in rows.values()})
+
+    def _recompute_successors(self):
+        self._mark_pages_diff_to_compute(self._get_successors() - self)
+
+    def _mark_pages_diff_to_compute(self, records):
+        if records:
+            for fname in ('pages_diff', 'bw_diff', 'color_diff'):
+                self.env.add_to_compute(self._fields[fname], records)
+
+    @api.model
+    def _get_adjacent_readings(self, keys, previous=True):
+        """Find the reading right before (or after) each ``(id, asset_id, date)``
+        key in ``(date, id)`` order, in one query.
+
+        Returns ``{key index: (id, bw_pages, color_pages, total_pages)}``, keys
+        without such a reading being left out.
+        """
+        if not keys:
+            return {}
+        ids, asset_ids, dates = zip(*keys)
+        operator, order = ('<', 'DESC') if previous else ('>', 'ASC')
+        self.env.cr.execute(f"""
+            SELECT r.seq, a.id, a.bw_pages, a.color_pages, a.total_pages
+              FROM unnest(%s::int[], %s::int[], %s::date[]) WITH ORDINALITY AS r(id, asset_id, date, seq)
+              CROSS JOIN LATERAL (
+                    SELECT u.id, u.bw_pages, u.color_pages, u.total_pages
+                      FROM it_asset_printer_usage u
+                     WHERE u.asset_id = r.asset_id
+                       AND (u.date, u.id) {operator} (r.date, r.id)
+                     ORDER BY u.date {order}, u.id {order}
+                     LIMIT 1
+              ) AS a
+        """, (list(ids), list(asset_ids), list(dates)))
+        return {seq - 1: tuple(row) for seq, *row in self.env.cr.fetchall()}
+
+    def _get_neighbour_readings(self, previous=True):
+        """Previous (or next) reading of each record, aligned with ``self``"""
+        self.flush_model(['asset_id', 'date', 'bw_pages', 'color_pages', 'total_pages'])
+        # Records not saved yet come after every reading of their date
+        keys = [(r._origin.id or MAX_ID, r.asset_id.id, r.date) for r in self]
+        valid = [index for index, key in enumerate(keys) if key[1] and key[2]]
+        readings = self._get_adjacent_readings([keys[index] for index in valid], previous)
+        result = [None] * len(keys)
+        for seq, index in enumerate(valid):
+            result[index] = readings.get(seq)
+        return result
+
     @api.depends('asset_id', 'date', 'total_pages', 'color_pages', 'bw_pages')
     def _compute_pages_diff(self):
-        for record in self:
-            prev_usage = self.search([
-                ('asset_id', '=', record.asset_id.id),
-                ('date', '<=', record.date),
-                ('id', '!=', record.id)
-            ], order='date desc, id desc', limit=1)
-            
+        for record, prev_usage in zip(self, self._get_neighbour_readings()):
             if prev_usage:
-                record.pages_diff = record.total_pages - prev_usage.total_pages
-                record.bw_diff = record.bw_pages - prev_usage.bw_pages
-                record.color_diff = record.color_pages - prev_usage.color_pages
+                prev_id, prev_bw, prev_color, prev_total = prev_usage
+                record.pages_diff = record.total_pages - prev_total
+                record.bw_diff = record.bw_pages - prev_bw
+                record.color_diff = record.color_pages - prev_color
             else:
                 record.pages_diff = 0
                 record.bw_diff = 0
                 record.color_diff = 0
 
-    @api.constrains('total_pages')
+    @api.constrains('asset_id', 'date', 'total_pages')
     def _check_counter_logic(self):
-        for record in self:
-            prev_usage = self.search([
-                ('asset_id', '=', record.asset_id.id),
-                ('date', '<', record.date)
-            ], order='date desc', limit=1)
-            if prev_usage and record.total_pages < prev_usage.total_pages:
-                raise ValidationError(_("Counter value cannot be less than the previous reading (%s pages).") % prev_usage.total_pages)
+        readings = zip(self, self._get_neighbour_readings(), self._get_neighbour_readings(previous=False))
+        for record, prev_usage, next_usage in readings:
+            if prev_usage and record.total_pages < prev_usage[3]:
+                raise ValidationError(_("Counter value cannot be less than the previous reading (%s pages).") % prev_usage[3])
+            if next_usage and record.total_pages > next_usage[3]:
+                raise ValidationError(_("Counter value cannot be greater than the next reading (%s pages).") % next_usage[3])
@@ -0,0 +1,251 @@
+from odoo import models, fields, api, Command, _
+from odoo.tools.pdf import merge_pdf
+import base64
+import logging
+import time
+from datetime import timedelta
+
+_logger = logging.getLogger(__name__)
+
+# Records rendered by a single wkhtmltopdf run
+CHUNK_SIZE = 50
+# Seconds a cron run keeps rendering before handing over to the next run
+TIME_LIMIT = 120
+# Days a cached document PDF is kept without being refreshed
+CACHE_RETENTION_DAYS = 30
+
+# Reports whose per-document PDFs are cached: the related records they print,
+# and whether they print the day they are rendered. Other reports are always
+# rendered from scratch.
+CACHED_REPORTS = {
+    'it_asset.report_asset_handover_template': {
+        'depends': ('employee_id', 'employee_id.job_id', 'employee_id.department_id', 'lot_id'),
+        'dated': True,
+    },
+    'it_asset.report_handover_new_template': {
+        'depends': ('asset_id', 'asset_id.lot_id', 'sender_id', 'sender_id.job_id', 'receiver_id', 'receiver_id.job_id'),
+        'dated': False,
+    },
+}
+
+class ITAssetReportBatch(models.Model):
+    _name = 'it_asset.report.batch'
+    _description = 'Background Report Printing'
+    _inherit = ['mail.thread']
+    _order = 'id desc'
+
+    name = fields.Char(string='Name', required=True, readonly=True)
+    report_id = fields.Many2one('ir.actions.report', string='Report', required=True, readonly=True, ondelete='cascade')
+    res_model = fields.Char(related='report_id.model', string='Document Model')
+    res_ids = fields.Json(string='Document Ids', readonly=True)
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('running', 'Rendering'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', required=True, default='queued', readonly=True, tracking=True)
+    record_count = fields.Integer(string='Documents', readonly=True)
+    done_count = fields.Integer(string='Processed', readonly=True)
+    cached_count = fields.Integer(string='Reused', readonly=True,
+                                  help="Documents whose PDF was reused because they did not change since they were last rendered")
+    progress = fields.Float(string='Progress', compute='_compute_progress')
+    chunk_attachment_ids = fields.Many2many('ir.attachment', 'it_asset_report_batch_chunk_rel', 'batch_id', 'attachment_id',
+                                            string='Rendered Chunks', readonly=True)
+    attachment_id = fields.Many2one('ir.attachment', string='Attachment', readonly=True)
+    pdf_file = fields.Binary(related='attachment_id.datas', string='PDF')
+    pdf_filename = fields.Char(related='attachment_id.name', string='File Name')
+    error = fields.Text(string='Error', readonly=True)
+
+    @api.depends('done_count', 'record_count')
+    def _compute_progress(self):
+        for batch in self:
+            batch.progress = 100.0 * batch.done_count / batch.record_count if batch.record_count else 0.0
+
+    @api.model
+    def _enqueue(self, report_ref, records):
+        """Queue the printing of ``report_ref`` for ``records`` and open the job"""
+        report = self.env['ir.actions.report']._get_report(report_ref)
+        batch = self.create({
+            'name': _("%(report)s - %(count)s documents", report=report.name, count=len(records)),
+            'report_id': report.id,
+            'res_ids': records.ids,
+            'record_count': len(records),
+        })
+        cron = self.env.ref('it_asset.ir_cron_render_report_batches', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': batch.id,
+            'view_mode': 'form',
+            'name': _("Print Job"),
+        }
+
+    def action_retry(self):
+        self.filtered(lambda b: b.state == 'failed').write({'state': 'queued', 'error': False})
+        cron = self.env.ref('it_asset.ir_cron_render_report_batches', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+
+    @api.model
+    def _cron_render_batches(self, time_limit=TIME_LIMIT):
+        """Render the queued jobs chunk by chunk, committing after each chunk.
+
+        Jobs are claimed with ``FOR UPDATE SKIP LOCKED`` so that concurrent
+        runs render different jobs. When the time limit is reached with work
+        left, the cron is triggered again instead of holding the worker.
+        """
+        started = time.monotonic()
+        while True:
+            self.env.cr.execute("""
+                SELECT id FROM it_asset_report_batch
+                 WHERE state IN ('queued', 'running')
+                 ORDER BY id
+                 LIMIT 1
+                   FOR UPDATE SKIP LOCKED
+            """)
+            row = self.env.cr.fetchone()
+            if not row:
+                return
+            if time.monotonic() - started > time_limit:
+                self.env.cr.rollback()
+                self.env.ref('it_asset.ir_cron_render_report_batches')._trigger()
+                return
+
+            batch = self.browse(row[0])
+            try:
+                batch._render_next_chunk()
+            except Exception as e:
+                _logger.error("Failed to render print job %s: %s", batch.id, str(e))
+                self.env.cr.rollback()
+                batch.write({'state': 'failed', 'error': str(e)})
+            self.env.cr.commit()
+
+    def _render_next_chunk(self):
+        self.ensure_one()
+        # Render as the requester, so the job prints what they may read
+        records = self.env[self.res_model].with_user(self.create_uid).browse(
+            self.res_ids[self.done_count:self.done_count + CHUNK_SIZE]
+        ).exists()
+        vals = {'state': 'running', 'done_count': min(self.done_count + CHUNK_SIZE, self.record_count)}
+        if records:
+            pdf, cached = self._render_chunk(records)
+            chunk = self.env['ir.attachment'].sudo().create({
+                'name': 'chunk-%05d.pdf' % self.done_count,
+                'raw': pdf,
+                'mimetype': 'application/pdf',
+            })
+            vals['chunk_attachment_ids'] = [Command.link(chunk.id)]
+            vals['cached_count'] = self.cached_count + cached
+        self.write(vals)
+        if self.done_count >= self.record_count:
+            self._finalize()
+
+    def _render_chunk(self, records):
+        """Return the PDF of ``records`` and how many of them came from the cache.
+
+        The PDF of every record is kept on the report, per user and language,
+        and reused as long as its cache key (see ``_get_cache_key``) does not
+        change.
+        """
+        report = self.report_id.with_user(self.create_uid)
+        if report.report_name not in CACHED_REPORTS:
+            return report._render_qweb_pdf(report.report_name, records.ids)[0], 0
+        Attachment = self.env['ir.attachment'].sudo()
+        records = records.with_env(report.env)
+        cache_names = {
+            record.id: '%s,%s,%s,%s.pdf' % (record._name, record.id, report.env.uid, report.env.lang or '')
+            for record in records
+        }
+        cache_keys = {record.id: self._get_cache_key(report, record) for record in records}
+        cache = {
+            attachment.name: attachment
+            for attachment in Attachment.search([
+                ('res_model', '=', 'ir.actions.report'),
+                ('res_id', '=', report.id),
+                ('name', 'in', list(cache_names.values())),
+            ])
+        }
+        pdfs = {}
+        for record in records:
+            attachment = cache.get(cache_names[record.id])
+            if attachment and attachment.description == cache_keys[record.id]:
+                pdfs[record.id] = attachment.raw
+        stale_ids = [record.id for record in records if record.id not in pdfs]
+
+        if stale_ids:
+            # One wkhtmltopdf run for the stale records, split back per record
+            streams = report.with_context(report_pdf_no_attachment=True)._render_qweb_pdf_prepare_streams(
+                report.report_name, {}, res_ids=stale_ids,
+            )
+            if any(not streams.get(res_id, {}).get('stream') for res_id in stale_ids):
+                # The PDF could not be split per record: when the whole chunk was
+                # rendered it is the chunk's PDF, otherwise print the chunk as a whole
+                if len(stale_ids) == len(records) and streams.get(False, {}).get('stream'):
+                    return streams[False]['stream'].getvalue(), 0
+                return report._render_qweb_pdf(report.report_name, records.ids)[0], 0
+            for record in records.browse(stale_ids):
+                pdf = streams[record.id]['stream'].getvalue()
+                pdfs[record.id] = pdf
+                vals = {'raw': pdf, 'description': cache_keys[record.id]}
+                if cache_names[record.id] in cache:
+                    cache[cache_names[record.id]].write(vals)
+                else:
+                    Attachment.create(dict(vals, name=cache_names[record.id], mimetype='application/pdf',
+                                           res_model='ir.actions.report', res_id=report.id))
+        return merge_pdf([pdfs[record.id] for record in records]), len(records) - len(stale_ids)
+
+    @api.model
+    def _get_cache_key(self, report, record):
+        """Return what the PDF of ``record`` depends on besides the user and
+        the language: the last change of the record, of the related records
+        and of the company printed in the layout, and the rendering day for
+        the reports printing it"""
+        options = CACHED_REPORTS[report.report_name]
+        company = report.env.company
+        parts = [str(record.write_date), str(company.write_date), str(company.partner_id.write_date)]
+        for path in options['depends']:
+            parts += sorted(str(related.write_date) for related in record.mapped(path))
+        if options['dated']:
+            parts.append(str(fields.Date.context_today(record)))
+        return '|'.join(parts)
+
+    def _finalize(self):
+        """Merge the rendered chunks and attach the result to the job"""
+        chunks = self.chunk_attachment_ids.sorted('id')
+        if not chunks:
+            # Every document was deleted in the meantime
+            self.write({'state': 'done'})
+            return
+        attachment = self.env['ir.attachment'].sudo().create({
+            'name': '%s.pdf' % self.report_id.name,
+            'datas': base64.b64encode(merge_pdf([chunk.raw for chunk in chunks])),
+            'mimetype': 'application/pdf',
+            'res_model': self._name,
+            'res_id': self.id,
+        })
+        chunks.unlink()
+        self.write({'state': 'done', 'attachment_id': attachment.id})
+        self.message_post(
+            body=_("%s documents printed, %s reused from the cache.", self.record_count, self.cached_count),
+            attachment_ids=attachment.ids,
+            partner_ids=self.create_uid.partner_id.ids,
+        )
+
+    @api.autovacuum
+    def _gc_report_batches(self):
+        """Drop the print jobs finished for a month, with their PDF"""
+        self.sudo().search([
+            ('state', 'in', ('done', 'failed')),
+            ('write_date', '<', fields.Datetime.now() - timedelta(days=30)),
+        ]).unlink()
+
+    @api.autovacuum
+    def _gc_report_cache(self):
+        """Drop the cached document PDFs not refreshed for a while"""
+        self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', 'ir.actions.report'),
+            ('res_id', 'in', self.env['ir.actions.report'].search([('report_name', 'in', list(CACHED_REPORTS))]).ids),
+            ('write_date', '<', fields.Datetime.now() - timedelta(days=CACHE_RETENTION_DAYS)),
+        ]).unlink()
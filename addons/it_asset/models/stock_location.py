@@ -0,0 +1,10 @@
+from odoo import models
+
+class StockLocation(models.Model):
+    _inherit = 'stock.location'
+
+    def unlink(self):
+        res = super().unlink()
+        # it_asset.asset caches the ids of the IT locations
+        self.env.registry.clear_cache()
+        return res
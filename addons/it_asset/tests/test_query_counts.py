@@ -0,0 +1,83 @@
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestDashboardQueryCounts(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Category = cls.env['it_asset.category']
+        cls.laptop = Category.search([('name', '=', 'Laptop')]) or Category.create({'name': 'Laptop'})
+        cls.radio_rig = Category.search([('name', '=', 'Radio Rig')]) or Category.create({'name': 'Radio Rig'})
+        product = cls.env['product.product'].create({'name': 'Test Device', 'type': 'consu'})
+        cls.assets = cls.env['it_asset.asset'].create([
+            {'name': 'Laptop 1', 'product_id': product.id, 'category_id': cls.laptop.id},
+            {'name': 'Laptop 2', 'product_id': product.id, 'category_id': cls.laptop.id, 'condition': 'degraded'},
+            {'name': 'Laptop 3', 'product_id': product.id, 'category_id': cls.laptop.id, 'state': 'retired'},
+            {'name': 'Radio 1', 'product_id': product.id, 'category_id': cls.radio_rig.id,
+             'asset_type': 'operation', 'radio_mode': 'digital'},
+            {'name': 'Radio 2', 'product_id': product.id, 'category_id': cls.radio_rig.id,
+             'asset_type': 'operation', 'radio_mode': 'analog', 'state': 'maintenance'},
+        ])
+
+    def _get_rows(self, live=False):
+        if live:
+            return sorted(self.env['it_asset.asset']._get_live_dashboard_rows(), key=str)
+        return sorted(self.env['it_asset.dashboard.stat']._get_rows(), key=str)
+
+    def test_materialized_stats_follow_assets(self):
+        self.assertEqual(self._get_rows(), self._get_rows(live=True))
+        self.assets[0].write({'condition': 'degraded'})
+        self.assets[4].write({'radio_mode': 'digital'})
+        self.assertEqual(self._get_rows(), self._get_rows(live=True))
+        self.assets[1].unlink()
+        self.assertEqual(self._get_rows(), self._get_rows(live=True))
+        self.env['it_asset.dashboard.stat']._gc_compact()
+        self.assertEqual(self._get_rows(), self._get_rows(live=True))
+
+    def test_dashboard_paths_agree(self):
+        Asset = self.env['it_asset.asset']
+        materialized = Asset.get_dashboard_stats(radio_mode='all')
+        live = Asset.get_dashboard_stats(date_start='2000-01-01', radio_mode='all')
+        for key in ('total_assets', 'total_it', 'total_operation', 'available', 'retired',
+                    'op_available', 'op_maintenance', 'category_distribution', 'laptop_condition_distribution'):
+            self.assertEqual(materialized[key], live[key], key)
+        self.assertGreaterEqual(materialized['total_operation'], 2)
+        self.assertEqual(materialized['fleet_comparison'], live['fleet_comparison'])
+
+    def test_dashboard_query_count(self):
+        Asset = self.env['it_asset.asset']
+        self.env.flush_all()
+        self.env.invalidate_all()
+        with self.assertQueryCount(6):
+            Asset.get_dashboard_stats()
+        self.env.invalidate_all()
+        with self.assertQueryCount(7):
+            Asset.get_dashboard_stats(date_start='2000-01-01', date_end='2100-01-01')
+
+    def test_form_counts_query_count(self):
+        Asset = self.env['it_asset.asset']
+        assets = Asset.create([
+            {'name': f'Radio {index}', 'product_id': self.assets.product_id.id, 'category_id': self.radio_rig.id}
+            for index in range(500)
+        ])
+        employee = self.env['hr.employee'].create({'name': 'Test Technician'})
+        self.env['it_asset.handover'].create([
+            {'asset_id': asset.id, 'sender_id': employee.id, 'receiver_id': employee.id}
+            for asset in assets[:100]
+        ])
+        self.env['it_asset.damage_report'].create([
+            {'asset_id': asset.id, 'employee_id': employee.id, 'damage_type': 'physical', 'description': 'Cracked casing'}
+            for asset in assets[:10] + assets[:3]
+        ])
+        self.env.flush_all()
+        self.env.invalidate_all()
+        with self.assertQueryCount(1):
+            counts = [(asset.damage_report_count, asset.handover_count) for asset in Asset.browse(assets.ids)]
+        self.assertEqual(counts[:3], [(2, 1)] * 3)
+        self.assertEqual(counts[50], (0, 1))
+        self.assertEqual(counts[-1], (0, 0))
+
+        assets[0].damage_report_ids[0].unlink()
+        self.assertEqual(assets[0].damage_report_count, 1)
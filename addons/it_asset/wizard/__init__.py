@@ -0,0 +1 @@
+from . import printer_usage_import
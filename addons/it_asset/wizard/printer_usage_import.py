@@ -0,0 +1,251 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+import base64
+import csv
+import io
+import json
+import logging
+from collections import defaultdict
+
+from ..models.printer_usage import MAX_ID
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+_logger = logging.getLogger(__name__)
+
+# Readings handed to a single create()
+BATCH_SIZE = 1000
+
+# Accepted column names, by reading field
+COLUMN_ALIASES = {
+    'asset_tag': ('asset_tag', 'tag', 'asset tag'),
+    'serial': ('serial', 'serial_number', 'serial number', 'lot', 'lot_id', 'sn'),
+    'date': ('date', 'reading_date'),
+    'bw_pages': ('bw_pages', 'bw', 'b/w', 'mono'),
+    'color_pages': ('color_pages', 'color', 'colour'),
+    'remarks': ('remarks', 'note'),
+}
+
+class ITPrinterUsageImport(models.TransientModel):
+    _name = 'it_asset.printer.usage.import'
+    _description = 'Import Printer Readings'
+
+    import_file = fields.Binary(string='File', required=True, attachment=False,
+                                help="CSV with a header row, or a JSON list of objects. Printers are matched by asset tag or serial number. "
+                                     "Rows are read one at a time; for JSON files this needs the ijson Python package.")
+    filename = fields.Char(string='File Name')
+    default_date = fields.Date(string='Default Date', required=True, default=fields.Date.context_today,
+                               help="Used for rows without a date")
+    state = fields.Selection([('draft', 'Draft'), ('done', 'Done')], default='draft')
+    created_count = fields.Integer(string='Readings Created', readonly=True)
+    reject_ids = fields.One2many('it_asset.printer.usage.import.reject', 'import_id', string='Rejected Rows', readonly=True)
+    reject_count = fields.Integer(compute='_compute_reject_count')
+
+    @api.depends('reject_ids')
+    def _compute_reject_count(self):
+        for wizard in self:
+            wizard.reject_count = len(wizard.reject_ids)
+
+    def _iter_rows(self):
+        """Yield ``(line number, row)`` for the uploaded file, rows being dicts
+        keyed by reading field"""
+        content = base64.b64decode(self.import_file)
+        if (self.filename or '').lower().endswith('.json') or content.lstrip()[:1] in (b'[', b'{'):
+            rows = (
+                (index, {str(key).strip().lower(): value for key, value in row.items()})
+                for index, row in enumerate(self._iter_json_objects(content), start=1) if isinstance(row, dict)
+            )
+        else:
+            reader = csv.reader(io.TextIOWrapper(io.BytesIO(content), encoding='utf-8-sig'))
+            header = [column.strip().lower() for column in next(reader, [])]
+            rows = ((reader.line_num, dict(zip(header, row))) for row in reader)
+
+        for line_number, row in rows:
+            yield line_number, {
+                field: next((row[alias] for alias in aliases if row.get(alias) not in (None, '')), None)
+                for field, aliases in COLUMN_ALIASES.items()
+            }
+
+    def _iter_json_objects(self, content):
+        """Yield the entries of a JSON list, or of the ``rows`` or ``data`` list
+        of a JSON object. When ``ijson`` is installed they are decoded one at a
+        time, otherwise the whole document is loaded first."""
+        if not ijson:
+            _logger.warning("ijson is not installed: printer readings JSON files are decoded whole")
+            try:
+                data = json.loads(content)
+            except ValueError as e:
+                raise UserError(_("The file is not valid JSON: %s", e))
+            if isinstance(data, dict):
+                data = data.get('rows') or data.get('data') or []
+            yield from data
+            return
+
+        prefixes = ('rows.item', 'data.item') if content.lstrip()[:1] == b'{' else ('item',)
+        try:
+            for prefix in prefixes:
+                found = False
+                for entry in ijson.items(io.BytesIO(content), prefix):
+                    found = True
+                    yield entry
+                if found:
+                    return
+        except ijson.JSONError as e:
+            raise UserError(_("The file is not valid JSON: %s", e))
+
+    def _get_printer_maps(self):
+        by_tag = {}
+        by_serial = {}
+        for asset in self.env['it_asset.asset'].search([('is_printer', '=', True)]):
+            if asset.asset_tag:
+                by_tag[asset.asset_tag.strip().lower()] = asset.id
+            if asset.lot_id:
+                by_serial[asset.lot_id.name.strip().lower()] = asset.id
+        return by_tag, by_serial
+
+    def action_import(self):
+        self.ensure_one()
+        by_tag, by_serial = self._get_printer_maps()
+        rejects = []
+        created = 0
+        batch = []
+        for line_number, row in self._iter_rows():
+            try:
+                vals = self._prepare_reading(row, by_tag, by_serial)
+            except ValueError as e:
+                rejects.append(self._prepare_reject(line_number, row, str(e)))
+                continue
+            batch.append((line_number, row, vals))
+            if len(batch) >= BATCH_SIZE:
+                created += self._import_batch(batch, rejects)
+                batch = []
+        if batch:
+            created += self._import_batch(batch, rejects)
+
+        self.reject_ids.unlink()
+        self.env['it_asset.printer.usage.import.reject'].create([dict(reject, import_id=self.id) for reject in rejects])
+        self.write({'state': 'done', 'created_count': created})
+        _logger.info("Printer readings import: %d created, %d rejected", created, len(rejects))
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+            'name': _("Import Printer Readings"),
+        }
+
+    def _prepare_reading(self, row, by_tag, by_serial):
+        """Return the reading values of a row, raise ValueError when invalid"""
+        asset_id = by_tag.get(str(row['asset_tag'] or '').strip().lower()) \
+            or by_serial.get(str(row['serial'] or '').strip().lower())
+        if not asset_id:
+            raise ValueError(_("No printer with this asset tag or serial number"))
+        try:
+            date = fields.Date.to_date(row['date']) if row['date'] else self.default_date
+        except (TypeError, ValueError):
+            raise ValueError(_("Invalid date: %s", row['date']))
+        try:
+            bw_pages = int(row['bw_pages'] or 0)
+            color_pages = int(row['color_pages'] or 0)
+        except (TypeError, ValueError):
+            raise ValueError(_("Counters must be whole numbers"))
+        if bw_pages < 0 or color_pages < 0:
+            raise ValueError(_("Counters cannot be negative"))
+        return {
+            'asset_id': asset_id,
+            'date': date,
+            'bw_pages': bw_pages,
+            'color_pages': color_pages,
+            'remarks': str(row['remarks']) if row['remarks'] is not None else False,
+        }
+
+    def _prepare_reject(self, line_number, row, reason):
+        return {
+            'line_number': line_number,
+            'identifier': row.get('asset_tag') or row.get('serial') or '',
+            'reading_date': str(row.get('date') or ''),
+            'reason': reason,
+        }
+
+    def _import_batch(self, batch, rejects):
+        """Check the counters of a batch against each other and the stored
+        readings, then create the valid readings at once"""
+        Usage = self.env['it_asset.printer.usage']
+        rows_by_asset = defaultdict(list)
+        for entry in batch:
+            rows_by_asset[entry[2]['asset_id']].append(entry)
+
+        # Stored readings overlapping the batch, plus the ones right before and after it
+        windows = {
+            asset_id: (min(e[2]['date'] for e in entries), max(e[2]['date'] for e in entries))
+            for asset_id, entries in rows_by_asset.items()
+        }
+        Usage.flush_model(['asset_id', 'date', 'total_pages'])
+        asset_ids = list(windows)
+        self.env.cr.execute("""
+            SELECT u.asset_id, u.date, u.id, u.total_pages
+              FROM it_asset_printer_usage u
+              JOIN unnest(%s::int[], %s::date[], %s::date[]) AS w(asset_id, date_from, date_to)
+                ON u.asset_id = w.asset_id AND u.date BETWEEN w.date_from AND w.date_to
+        """, (asset_ids, [windows[a][0] for a in asset_ids], [windows[a][1] for a in asset_ids]))
+        stored = defaultdict(list)
+        for asset_id, date, usage_id, total in self.env.cr.fetchall():
+            stored[asset_id].append((date, usage_id, total))
+        before = Usage._get_adjacent_readings([(0, a, windows[a][0]) for a in asset_ids])
+        after = Usage._get_adjacent_readings([(MAX_ID, a, windows[a][1]) for a in asset_ids], previous=False)
+
+        vals_list = []
+        for index, asset_id in enumerate(asset_ids):
+            # New readings sort after the stored ones of the same date
+            sequence = [(date, 0, usage_id, total, None) for date, usage_id, total in stored[asset_id]]
+            sequence += [(e[2]['date'], 1, position, e[2]['bw_pages'] + e[2]['color_pages'], e)
+                         for position, e in enumerate(rows_by_asset[asset_id])]
+            sequence.sort(key=lambda item: item[:3])
+
+            # Counter of the next stored reading, for every position
+            next_totals = []
+            next_total = after[index][3] if index in after else None
+            for item in reversed(sequence):
+                next_totals.append(next_total)
+                if item[4] is None:
+                    next_total = item[3]
+            next_totals.reverse()
+
+            last_total = before[index][3] if index in before else None
+            stored_keys = {(date, total) for date, usage_id, total in stored[asset_id]}
+            for (date, is_new, key, total, entry), next_total in zip(sequence, next_totals):
+                if entry is None:
+                    last_total = total
+                    continue
+                line_number, row, vals = entry
+                if (date, total) in stored_keys:
+                    reason = _("Reading already recorded")
+                elif last_total is not None and total < last_total:
+                    reason = _("Counter lower than the previous reading (%s pages)", last_total)
+                elif next_total is not None and total > next_total:
+                    reason = _("Counter greater than the next reading (%s pages)", next_total)
+                else:
+                    vals_list.append(vals)
+                    stored_keys.add((date, total))
+                    last_total = total
+                    continue
+                rejects.append(self._prepare_reject(line_number, row, reason))
+
+        Usage.create(vals_list)
+        return len(vals_list)
+
+
+class ITPrinterUsageImportReject(models.TransientModel):
+    _name = 'it_asset.printer.usage.import.reject'
+    _description = 'Rejected Printer Reading'
+    _order = 'line_number'
+
+    import_id = fields.Many2one('it_asset.printer.usage.import', required=True, ondelete='cascade')
+    line_number = fields.Integer(string='Line', help="Line of the CSV file, or position in the JSON list")
+    identifier = fields.Char(string='Asset Tag / Serial')
+    reading_date = fields.Char(string='Date')
+    reason = fields.Char(string='Reason')